@@ -0,0 +1,123 @@
+"""
+aggregate.py - Precompute the tracker's weighted polling averages.
+
+Computes the same average as weightedAverageDemo in src/App.jsx, weight =
+exp(-age_days / 60) * sqrt(sampleSize or 500), for every (state, demographic
+filter, candidate) cell in one batched NumPy pass, and writes the result to
+public/aggregates.json for the frontend to render directly.
+
+Because every weight shares the same exp(-now / 60) factor, the weighted
+average does not depend on "now": ages are measured from the newest poll and
+the artifact stays exact until the polls themselves change. It carries no
+timestamp, so a run that adds no polls rewrites it byte for byte and leaves
+nothing for the workflow to commit.
+
+Run manually:  python scripts/aggregate.py
+(fetch_polls.py and backfill_polls.py run it after writing polls.json.)
+"""
+import json
+from pathlib import Path
+
+import numpy as np
+
+from poll_matrix import PollMatrix
+
+AGGREGATES_FILE = Path(__file__).parent.parent / "public" / "aggregates.json"
+
+RECENCY_DAYS = 60
+DEFAULT_SAMPLE = 500
+
+# Keep in sync with CANDIDATES and DEMO_FILTERS in src/App.jsx
+CANDIDATES = [
+    "harris", "newsom", "buttigieg", "ocasio", "shapiro", "pritzker",
+    "booker", "whitmer", "beshear", "kelly", "moore", "slotkin", "sanders",
+    "gallego", "warnock", "ossoff", "klobuchar", "khanna", "cooper", "murphy", "stewart"
+]
+
+DEMO_FILTERS = [
+    ("gender", "Men"), ("gender", "Women"),
+    ("age", "18-34"), ("age", "35-49"), ("age", "50-64"), ("age", "65+"),
+    ("race", "White"), ("race", "Black"), ("race", "Hispanic"), ("race", "Other"),
+    ("education", "No college"), ("education", "Some college"),
+    ("education", "College grad"), ("education", "Postgrad"),
+    ("ideology", "Very liberal"), ("ideology", "Somewhat liberal"),
+    ("ideology", "Moderate"), ("ideology", "Conservative"),
+]
+
+# Filter keys in the artifact; "overall" is the topline (no demographic filter)
+FILTER_KEYS = ["overall"] + [f"{category}:{group}" for category, group in DEMO_FILTERS]
+
+
+def poll_values(matrix):
+    """polls x candidates x filters array of values (topline first), NaN where missing."""
+    toplines = matrix.toplines_for(CANDIDATES)[:, :, None]
+    crosstabs = matrix.crosstabs_for(CANDIDATES, DEMO_FILTERS)
+    return np.concatenate([toplines, crosstabs], axis=2).astype(float)
+
+
+def sample_weights(matrix):
+    """sqrt(sampleSize or 500) per poll."""
+    samples = matrix.sample.astype(float)
+    return np.sqrt(np.where(np.isnan(samples) | (samples == 0), DEFAULT_SAMPLE, samples))
+
+
+def poll_weights(matrix):
+    """Recency x sqrt(sample size) weight per poll, ages measured from the newest poll."""
+    days = matrix.day.astype(float)
+    return np.exp(-(days.max() - days) / RECENCY_DAYS) * sample_weights(matrix)
+
+
+def compute_aggregates(polls):
+    """{"All" | state: [[average or None per candidate] per filter]} for every state."""
+    matrix = PollMatrix.from_polls(polls, CANDIDATES, DEMO_FILTERS)
+    dated = matrix.day > 0
+    if not dated.any():
+        return {}
+    poll_states = np.array(matrix.state_names(), dtype=object)[dated]
+    states = sorted(set(poll_states))
+
+    values = poll_values(matrix)[dated]
+    weights = poll_weights(matrix)[dated]
+    present = ~np.isnan(values)
+
+    # membership[s, p] = 1 if poll p counts toward state row s; row 0 is "All"
+    state_index = {s: i + 1 for i, s in enumerate(states)}
+    membership = np.zeros((len(states) + 1, len(weights)))
+    membership[0] = 1
+    membership[[state_index[s] for s in poll_states], np.arange(len(weights))] = 1
+
+    weighted = membership * weights
+    num = np.einsum("sp,pcf->sfc", weighted, np.where(present, values, 0.0))
+    den = np.einsum("sp,pcf->sfc", weighted, present.astype(float))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        averages = np.where(den > 0, num / den, np.nan)
+
+    result = {}
+    for name, row in zip(["All"] + states, averages):
+        result[name] = [[None if np.isnan(v) else round(float(v), 4) for v in cands] for cands in row]
+    return result
+
+
+def write_aggregates(polls, path=AGGREGATES_FILE):
+    artifact = {
+        "polls": len(polls),
+        "candidates": CANDIDATES,
+        "filters": FILTER_KEYS,
+        "states": compute_aggregates(polls),
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w") as f:
+        json.dump(artifact, f, separators=(",", ":"))
+    tmp.replace(path)
+    print(f"  Wrote aggregates for {len(artifact['states'])} state views to {path.name}")
+
+
+def main():
+    from poll_store import PollStore
+
+    write_aggregates(PollStore.open().polls())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+backfill_ledger.py - Persistent record of backfill attempts, so dead ends are not retried daily.
+
+Entries are keyed by poll id plus the sorted set of candidates that were
+missing, and stored in .cache/backfill_ledger.json:
+
+    "<poll id>|booker,kelly,moore": {
+        "poll_id": "...", "missing": ["booker", "kelly", "moore"],
+        "failures": 3, "last_attempt": 1760000000.0, "retry_after": 1760345600.0,
+        "strategies": {"direct_pdf": {"ran": 1760000000.0, "found": 0}, ...}}
+
+"found" is how many of the missing candidates a strategy returned a number
+for; a strategy that failed (network error, 5xx, 429s past their retries,
+an unreadable reply) also has an "error". A run that fills nothing puts the
+key in cooldown for BASE_TTL, doubling with each consecutive failure up to
+MAX_TTL; select_candidates skips keys in cooldown and ranks keys that have
+failed before behind fresh ones. Only genuinely empty answers count as
+failures: a run in which any strategy errored just records "last_error",
+so an API outage does not put every poll it touched into cooldown. Filling
+even one candidate changes the missing set, so the poll comes back under a
+new key and the old entry is dropped. Entries for keys no poll has any more
+are pruned when candidates are selected.
+"""
+import json
+import threading
+import time
+from pathlib import Path
+
+from paths import CACHE_ROOT
+
+LEDGER_FILE = CACHE_ROOT / "backfill_ledger.json"
+
+DAY = 24 * 3600
+BASE_TTL = DAY
+MAX_TTL = 32 * DAY
+
+
+def ledger_key(poll_id, missing):
+    return f"{poll_id}|{','.join(sorted(missing))}"
+
+
+def cooldown(failures):
+    """Seconds to wait after `failures` consecutive empty attempts."""
+    if failures <= 0:
+        return 0
+    return min(MAX_TTL, BASE_TTL * 2 ** (failures - 1))
+
+
+class BackfillLedger:
+    """Attempt history shared by backfill worker threads; save() writes it back."""
+
+    def __init__(self, path=LEDGER_FILE):
+        self.path = Path(path)
+        self.lock = threading.Lock()
+        try:
+            with open(self.path) as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def get(self, poll_id, missing):
+        return self.entries.get(ledger_key(poll_id, missing))
+
+    def failures(self, poll_id, missing):
+        entry = self.get(poll_id, missing)
+        return entry["failures"] if entry else 0
+
+    def cooling(self, poll_id, missing, now=None):
+        """Whether this poll's missing set failed recently enough to be skipped."""
+        entry = self.get(poll_id, missing)
+        return bool(entry) and entry["retry_after"] > (time.time() if now is None else now)
+
+    def _entry(self, poll_id, missing):
+        return self.entries.setdefault(ledger_key(poll_id, missing), {
+            "poll_id": poll_id, "missing": sorted(missing), "failures": 0,
+            "last_attempt": None, "retry_after": 0, "strategies": {},
+        })
+
+    def record_strategy(self, poll_id, missing, strategy, found, error=None):
+        """One strategy ran for this poll and returned numbers for `found` missing candidates,
+        or failed with `error`."""
+        if not poll_id:
+            return
+        result = {"ran": time.time(), "found": found}
+        if error:
+            result["error"] = error
+        with self.lock:
+            self._entry(poll_id, missing)["strategies"][strategy] = result
+
+    def finish(self, poll_id, missing, improved, errored=False):
+        """End of an attempt: an improved poll leaves the ledger, an empty one backs off
+        further, and one whose strategies errored is left to be retried next run."""
+        if not poll_id:
+            return
+        key = ledger_key(poll_id, missing)
+        now = time.time()
+        with self.lock:
+            if improved:
+                self.entries.pop(key, None)
+                return
+            entry = self._entry(poll_id, missing)
+            if errored:
+                entry["last_error"] = now
+                return
+            entry["failures"] += 1
+            entry["last_attempt"] = now
+            entry["retry_after"] = now + cooldown(entry["failures"])
+
+    def prune(self, live_keys):
+        """Drop entries whose poll is gone or whose missing set has changed."""
+        with self.lock:
+            stale = [key for key in self.entries if key not in live_keys]
+            for key in stale:
+                del self.entries[key]
+        return len(stale)
+
+    def save(self):
+        with self.lock:
+            data = json.dumps(self.entries, indent=1, sort_keys=True)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        tmp.write_text(data)
+        tmp.replace(self.path)
@@ -6,24 +6,41 @@ searches for the original source (PDF or web), and fills in missing numbers.
 
 Run manually:  python scripts/backfill_polls.py
 Or with flag:  python scripts/backfill_polls.py --min-missing 3
+In parallel:   python scripts/backfill_polls.py --limit 200 --workers 8
+As one batch:  python scripts/backfill_polls.py --min-missing 1 --limit 500 --batch
 """
 
-import anthropic
 import json
 import os
 import re
 import io
 import argparse
+import contextlib
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
 
-POLLS_FILE = Path(__file__).parent.parent / "public" / "polls.json"
-
-CANDIDATES = [
-    "harris","newsom","buttigieg","ocasio","shapiro","pritzker",
-    "booker","whitmer","beshear","kelly","moore","slotkin","sanders",
-    "gallego","warnock","ossoff","klobuchar","khanna","cooper","murphy","stewart"
-]
+import anthropic
+import numpy as np
+import requests
+
+from aggregate import CANDIDATES
+from backfill_ledger import BackfillLedger, ledger_key
+import llm_cache
+from paths import CACHE_ROOT
+from poll_matrix import PollMatrix
+from poll_store import PollStore, POLLS_FILE
+from rate_limiter import RateLimiter, DEFAULT_RPM, DEFAULT_TPM, TRANSIENT_ERRORS, make_client
+from run_metrics import METRICS, METRICS_FILE, profiled
+import shard_export
+
+BATCH_CHECKPOINT = CACHE_ROOT / "backfill_batch.json"
+BATCH_POLL_INTERVAL = 60
+BATCH_API_RETRIES = 2
+BATCH_STRATEGIES = {"pdf_parse": "direct_pdf", "poll_search": "web_search"}  # batch request kind -> ledger strategy
 
 CANDIDATE_NAMES = {
     "harris": "Kamala Harris", "newsom": "Gavin Newsom", "buttigieg": "Pete Buttigieg",
@@ -42,15 +59,26 @@ FULL_FIELD_POLLSTERS = [
     "Quinnipiac", "Marist", "Monmouth", "Siena"
 ]
 
+# PDF extraction: pages are split across processes and only the most relevant
+# pages (by candidate-name and keyword hits) are sent, up to PDF_CHAR_BUDGET chars
+PDF_WORKERS = os.cpu_count() or 1
+PDF_PARALLEL_MIN_PAGES = 16
+PDF_CHAR_BUDGET = 12000
+PDF_KEYWORDS = ["2028", "primary"]
+_pdf_pool = None
+_pdf_pool_lock = threading.Lock()
+
+# Shared by every worker thread; main() replaces it once --rpm/--tpm are known.
+LIMITER = RateLimiter()
 
-def load_polls():
-    with open(POLLS_FILE) as f:
-        return json.load(f)
 
-def save_polls(polls):
-    polls.sort(key=lambda p: p["date"], reverse=True)
-    with open(POLLS_FILE, "w") as f:
-        json.dump(polls, f, indent=2)
+def create_message(client, call_site, **kwargs):
+    """client.messages.create through the LLM cache and the process-wide rate limiter."""
+    return llm_cache.create(client, call_site, limiter=LIMITER, **kwargs)
+
+
+def load_polls():
+    return PollStore.open().polls()
 
 
 def is_pdf_url(url):
@@ -65,37 +93,133 @@ def is_pdf_url(url):
     )
 
 
-def fetch_pdf_text(url):
+def _extract_page_range(pdf_bytes, start, stop):
+    """Process-pool worker: extract text for pages [start, stop) of one PDF."""
+    import pdfplumber
+
+    with pdfplumber.open(io.BytesIO(pdf_bytes)) as pdf:
+        return [(pdf.pages[i].extract_text() or "") for i in range(start, min(stop, len(pdf.pages)))]
+
+
+def _get_pdf_pool():
+    # Created on first use from a worker thread; forking a process that has threads
+    # running (SDK/httpx, the rate limiter) can deadlock the child, so start from a forkserver
+    global _pdf_pool
+    with _pdf_pool_lock:
+        if _pdf_pool is None:
+            _pdf_pool = ProcessPoolExecutor(max_workers=PDF_WORKERS,
+                                            mp_context=multiprocessing.get_context("forkserver"))
+        return _pdf_pool
+
+
+def extract_pdf_pages(pdf_bytes):
+    """Return the text of every page, spreading large PDFs over a process pool."""
+    import pdfplumber
+
+    with pdfplumber.open(io.BytesIO(pdf_bytes)) as pdf:
+        page_count = len(pdf.pages)
+        if page_count < PDF_PARALLEL_MIN_PAGES or PDF_WORKERS < 2:
+            return [p.extract_text() or "" for p in pdf.pages]
+
+    step = -(-page_count // PDF_WORKERS)
+    pool = _get_pdf_pool()
+    futures = [pool.submit(_extract_page_range, pdf_bytes, i, i + step) for i in range(0, page_count, step)]
+    return [text for f in futures for text in f.result()]
+
+
+class StrategyError(Exception):
+    """A strategy failed (network, 5xx, exhausted 429 retries) rather than coming back
+    empty; the ledger does not back off on these."""
+
+
+# Failures of the call rather than of the poll, worth retrying next run. Anything else
+# (a PDF pdfplumber rejects, a reply that is not the JSON asked for, a request the API
+# refuses) is an empty answer, so the ledger's cooldown applies.
+RETRYABLE_ERRORS = (requests.ConnectionError, requests.Timeout, anthropic.RateLimitError,
+                    llm_cache.CacheMiss) + TRANSIENT_ERRORS
+
+
+@contextlib.contextmanager
+def strategy_step(label):
+    """Run one step of a strategy: retryable errors are raised as StrategyError, any other
+    exception is logged and swallowed, leaving the step's result empty."""
     try:
-        import requests
+        yield
+    except (StrategyError, anthropic.AuthenticationError, anthropic.PermissionDeniedError):
+        raise  # bad credentials are the run's problem, not every poll's
+    except RETRYABLE_ERRORS as e:
+        print(f"    {label} error: {e}")
+        raise StrategyError(str(e)) from e
+    except Exception as e:
+        print(f"    {label} failed: {e}")
+
+
+def fetch_pdf_pages(url):
+    """Download a PDF and return its per-page text (list of strings), or None if there is
+    none to be had. Raises StrategyError when the download itself failed."""
+    try:
+        import http_cache
         import pdfplumber
+    except ImportError as e:
+        print("    pdfplumber/requests not installed")
+        raise StrategyError(str(e)) from e
 
+    with strategy_step("PDF fetch"):
         headers = {"User-Agent": "Mozilla/5.0 (compatible; PollBot/1.0)"}
-        resp = requests.get(url, timeout=45, headers=headers)
+        resp = http_cache.get(url, timeout=45, headers=headers)
         if resp.status_code != 200:
             print(f"    PDF HTTP {resp.status_code}: {url}")
+            if resp.status_code == 429 or resp.status_code >= 500:
+                raise StrategyError(f"PDF HTTP {resp.status_code}")
             return None
 
-        with pdfplumber.open(io.BytesIO(resp.content)) as pdf:
-            pages_text = [p.extract_text() or "" for p in pdf.pages]
-        full_text = "\n".join(t for t in pages_text if t.strip())
-
-        if not full_text.strip():
+        # Extracted pages are cached next to the PDF bytes, so a warm run skips pdfplumber
+        cached = http_cache.load_derived(resp.body_hash, "pages.json")
+        if cached is not None:
+            pages = json.loads(cached)
+            print(f"    PDF pages from cache: {len(pages)} pages")
+        else:
+            pages = extract_pdf_pages(resp.content)
+            http_cache.save_derived(resp.body_hash, "pages.json", json.dumps(pages))
+            print(f"    PDF extracted: {sum(len(p) for p in pages)} chars, {len(pages)} pages")
+
+        if not any(p.strip() for p in pages):
             return None
 
-        print(f"    PDF extracted: {len(full_text)} chars, {len(pages_text)} pages")
-        return full_text
+        return pages
+    return None
 
-    except ImportError:
-        print("    pdfplumber/requests not installed")
-        return None
-    except Exception as e:
-        print(f"    PDF fetch error: {e}")
-        return None
 
+def score_pdf_page(text, missing_candidates):
+    """Relevance of one page: distinct missing candidates named, plus name and keyword hits."""
+    lower = text.lower()
+    hits = [lower.count(CANDIDATE_NAMES[c].split()[-1].lower()) for c in missing_candidates]
+    keywords = sum(lower.count(k) for k in PDF_KEYWORDS)
+    return 5 * sum(1 for h in hits if h) + sum(hits) + keywords
 
-def parse_numbers_from_pdf(client, pdf_text, poll, missing_candidates):
-    """Ask Claude to extract specific missing candidate numbers from PDF text."""
+
+def select_pdf_pages(pages, missing_candidates, budget=PDF_CHAR_BUDGET):
+    """Pick the best-scoring pages that fit in `budget` chars, returned in document order."""
+    scored = [(score_pdf_page(text, missing_candidates), i) for i, text in enumerate(pages) if text.strip()]
+    ranked = sorted((s for s in scored if s[0] > 0), key=lambda s: (-s[0], s[1])) or scored
+
+    chosen, used = [], 0
+    for _, i in ranked:
+        section = f"--- Page {i + 1} ---\n{pages[i]}\n"
+        if used + len(section) > budget:
+            if chosen:
+                continue
+            section = section[:budget]  # a single page larger than the whole budget
+        chosen.append((i, section))
+        used += len(section)
+
+    chosen.sort()
+    print(f"    Sending {len(chosen)} of {len(pages)} pages ({used} chars) to the model")
+    return "".join(section for _, section in chosen)
+
+
+def pdf_parse_request(pdf_text, poll, missing_candidates):
+    """messages.create arguments asking Claude for specific missing numbers in PDF text."""
     missing_names = [CANDIDATE_NAMES[c] for c in missing_candidates]
     cand_list = "\n".join(f'  "{c}": number or null,' for c in missing_candidates)
 
@@ -115,25 +239,32 @@ Return ONLY a JSON object with these candidate IDs and their percentages (or nul
 Be precise — use the exact numbers from the document. No markdown, no explanation.
 
 --- DOCUMENT ---
-{pdf_text[:12000]}
+{pdf_text}
 --- END ---
 """
-    try:
-        resp = client.messages.create(
-            model="claude-haiku-4-5-20251001",
-            max_tokens=500,
-            messages=[{"role": "user", "content": prompt}],
-        )
-        raw = resp.content[0].text.strip()
-        raw = re.sub(r"```json|```", "", raw).strip()
-        return json.loads(raw)
-    except Exception as e:
-        print(f"    Parse error: {e}")
-        return None
+    return {
+        "model": "claude-haiku-4-5-20251001",
+        "max_tokens": 500,
+        "messages": [{"role": "user", "content": prompt}],
+    }
 
 
-def search_for_poll_data(client, poll, missing_candidates):
-    """Use web search to find missing candidate numbers for a poll."""
+def read_pdf_parse(message):
+    raw = message.content[0].text.strip()
+    raw = re.sub(r"```json|```", "", raw).strip()
+    return json.loads(raw)
+
+
+def parse_numbers_from_pdf(client, pdf_text, poll, missing_candidates):
+    """Ask Claude to extract specific missing candidate numbers from PDF text."""
+    with strategy_step("Parse"):
+        resp = create_message(client, "pdf_parse", **pdf_parse_request(pdf_text, poll, missing_candidates))
+        return read_pdf_parse(resp)
+    return None
+
+
+def poll_search_request(poll, missing_candidates):
+    """messages.create arguments for a web search for a poll's missing numbers."""
     missing_names = [CANDIDATE_NAMES[c] for c in missing_candidates[:6]]  # top 6 missing
     cand_list = "\n".join(f'  "{c}": number or null,' for c in missing_candidates)
 
@@ -156,19 +287,27 @@ Return ONLY a JSON object with candidate IDs and their percentages (or null if n
 
 No markdown, no explanation. If you can't find the data, return all nulls.
 """
-    try:
-        resp = client.messages.create(
-            model="claude-haiku-4-5-20251001",
-            max_tokens=600,
-            tools=[{"type": "web_search_20250305", "name": "web_search"}],
-            messages=[{"role": "user", "content": prompt}],
-        )
-        raw = "".join(b.text for b in resp.content if b.type == "text").strip()
-        raw = re.sub(r"```json|```", "", raw).strip()
-        if raw.startswith("{"):
-            return json.loads(raw)
-    except Exception as e:
-        print(f"    Search error: {e}")
+    return {
+        "model": "claude-haiku-4-5-20251001",
+        "max_tokens": 600,
+        "tools": [{"type": "web_search_20250305", "name": "web_search"}],
+        "messages": [{"role": "user", "content": prompt}],
+    }
+
+
+def read_poll_search(message):
+    raw = "".join(b.text for b in message.content if b.type == "text").strip()
+    raw = re.sub(r"```json|```", "", raw).strip()
+    if raw.startswith("{"):
+        return json.loads(raw)
+    return None
+
+
+def search_for_poll_data(client, poll, missing_candidates):
+    """Use web search to find missing candidate numbers for a poll."""
+    with strategy_step("Search"):
+        resp = create_message(client, "poll_search", **poll_search_request(poll, missing_candidates))
+        return read_poll_search(resp)
     return None
 
 
@@ -186,8 +325,10 @@ Date: {poll['date']}
 
 Search for it and return ONLY the direct PDF URL, nothing else. If not found, return: null
 """
-    try:
-        resp = client.messages.create(
+    with strategy_step("PDF URL search"):
+        resp = create_message(
+            client,
+            "pdf_url_search",
             model="claude-haiku-4-5-20251001",
             max_tokens=200,
             tools=[{"type": "web_search_20250305", "name": "web_search"}],
@@ -198,14 +339,28 @@ Search for it and return ONLY the direct PDF URL, nothing else. If not found, re
         if raw and raw != "null" and raw.startswith("http") and is_pdf_url(raw):
             print(f"    Found PDF URL: {raw}")
             return raw
-    except Exception as e:
-        print(f"    PDF URL search error: {e}")
     return None
 
 
-def backfill_poll(client, poll, min_missing=3):
-    """Try to fill missing candidate data for a single poll. Returns updated poll or None."""
-    missing = [c for c in CANDIDATES if poll.get(c) is None]
+def missing_candidates(poll):
+    return [c for c in CANDIDATES if poll.get(c) is None]
+
+
+def found_count(filled, missing):
+    """How many missing candidates a strategy's answer has a number for."""
+    if not isinstance(filled, dict):
+        return 0
+    return sum(1 for c in missing if isinstance(filled.get(c), (int, float)))
+
+
+def backfill_poll(client, poll, min_missing=3, ledger=None):
+    """Try to fill missing candidate data for a single poll. Returns updated poll or None.
+
+    With a ledger, every strategy that runs and the overall outcome are recorded. A
+    strategy that errors counts as neither an answer nor an empty result: the poll
+    only backs off when every strategy that ran came back genuinely empty.
+    """
+    missing = missing_candidates(poll)
 
     if len(missing) < min_missing:
         return None  # Not enough missing to bother
@@ -218,34 +373,65 @@ def backfill_poll(client, poll, min_missing=3):
     print(f"    Missing {len(missing)} candidates: {', '.join(missing)}")
 
     filled = None
+    errors = {}  # strategy -> error message
 
     # Strategy 1: Try direct PDF URL
     source_url = poll.get("source_url", "")
     if is_pdf_url(source_url):
         print(f"    Trying direct PDF: {source_url[:60]}")
-        pdf_text = fetch_pdf_text(source_url)
-        if pdf_text:
-            filled = parse_numbers_from_pdf(client, pdf_text, poll, missing)
+        with METRICS.phase("strategy:direct_pdf"), caught(errors, "direct_pdf"):
+            pages = fetch_pdf_pages(source_url)
+            if pages:
+                filled = parse_numbers_from_pdf(client, select_pdf_pages(pages, missing), poll, missing)
+        note_strategy(ledger, poll, missing, "direct_pdf", filled, errors.get("direct_pdf"))
 
     # Strategy 2: Search for PDF URL if we don't have one
     if not filled and not is_pdf_url(source_url):
-        pdf_url = find_pdf_url(client, poll)
-        if pdf_url:
-            pdf_text = fetch_pdf_text(pdf_url)
-            if pdf_text:
-                filled = parse_numbers_from_pdf(client, pdf_text, poll, missing)
-                if filled:
-                    poll["source_url"] = pdf_url  # Update source URL to direct PDF
+        with METRICS.phase("strategy:pdf_search"), caught(errors, "pdf_search"):
+            pdf_url = find_pdf_url(client, poll)
+            if pdf_url:
+                pages = fetch_pdf_pages(pdf_url)
+                if pages:
+                    filled = parse_numbers_from_pdf(client, select_pdf_pages(pages, missing), poll, missing)
+                    if filled:
+                        poll["source_url"] = pdf_url  # Update source URL to direct PDF
+        note_strategy(ledger, poll, missing, "pdf_search", filled, errors.get("pdf_search"))
 
     # Strategy 3: Web search for the data
     if not filled:
         print(f"    Trying web search...")
-        filled = search_for_poll_data(client, poll, missing)
+        with METRICS.phase("strategy:web_search"), caught(errors, "web_search"):
+            filled = search_for_poll_data(client, poll, missing)
+        note_strategy(ledger, poll, missing, "web_search", filled, errors.get("web_search"))
 
     if not filled:
-        print(f"    Could not find data")
-        return None
+        print(f"    Could not find data{' (errors, will retry)' if errors else ''}")
+        updated = None
+    else:
+        updated = apply_filled(poll, missing, filled)
+    if ledger is not None:
+        ledger.finish(poll.get("id"), missing, updated is not None, errored=bool(errors))
+    return updated
+
+
+@contextlib.contextmanager
+def caught(errors, strategy):
+    """Store a StrategyError raised by the enclosed strategy in errors[strategy] instead of raising it."""
+    try:
+        yield
+    except StrategyError as e:
+        errors[strategy] = str(e)
+
+
+def note_strategy(ledger, poll, missing, strategy, filled, error=None):
+    found = found_count(filled, missing)
+    METRICS.record_strategy(strategy, found > 0)
+    if ledger is not None:
+        ledger.record_strategy(poll.get("id"), missing, strategy, found, error=error)
+
 
+def apply_filled(poll, missing, filled):
+    """Copy of poll with model-supplied numbers filled into the missing fields, or None."""
     # Merge results - only update fields that were null and now have values
     updated = dict(poll)
     improved = 0
@@ -263,42 +449,196 @@ def backfill_poll(client, poll, min_missing=3):
     return updated
 
 
-def main():
-    parser = argparse.ArgumentParser(description="Backfill missing poll data")
-    parser.add_argument("--min-missing", type=int, default=3, help="Minimum missing candidates to trigger backfill (default: 3)")
-    parser.add_argument("--limit", type=int, default=20, help="Max polls to process (default: 20)")
-    parser.add_argument("--pollster", type=str, default=None, help="Only backfill a specific pollster")
-    parser.add_argument("--dry-run", action="store_true", help="Don't save changes, just show what would be updated")
-    args = parser.parse_args()
+def build_batch_requests(candidates, workers=1):
+    """One batch request per poll: a PDF parse if its direct PDF downloads, else a web search.
+
+    PDF-URL discovery (strategy 2) needs a model round-trip before the parse can be
+    built, so it is not part of batch mode; the web-search fallback after an empty
+    parse is run_batch's second round. Returns (requests, plan) where plan maps
+    custom_id -> poll id, request kind and the candidates it asks for.
+    """
+    def build(item):
+        i, poll = item
+        missing = missing_candidates(poll)
+        source_url = poll.get("source_url", "")
+        try:
+            pages = fetch_pdf_pages(source_url) if is_pdf_url(source_url) else None
+        except StrategyError:
+            pages = None
+        if pages:
+            return f"pdf-{i}", "pdf_parse", missing, pdf_parse_request(select_pdf_pages(pages, missing), poll, missing)
+        return f"search-{i}", "poll_search", missing, poll_search_request(poll, missing)
+
+    polls = [poll for _, poll in candidates if "id" in poll]
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        built = list(pool.map(build, enumerate(polls)))
+
+    batch_requests, plan = [], {}
+    for (custom_id, kind, missing, params), poll in zip(built, polls):
+        batch_requests.append({"custom_id": custom_id, "params": params})
+        plan[custom_id] = {"poll_id": poll["id"], "kind": kind, "missing": missing}
+    return batch_requests, plan
+
+
+def load_batch_checkpoint():
+    try:
+        with open(BATCH_CHECKPOINT) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
 
-    print(f"=== Poll Backfiller {datetime.utcnow().isoformat()} UTC ===")
-    print(f"Min missing: {args.min_missing} | Limit: {args.limit} | Dry run: {args.dry_run}")
 
-    client = anthropic.Anthropic(api_key=os.environ["ANTHROPIC_API_KEY"])
-    polls = load_polls()
-    print(f"Loaded {len(polls)} polls")
+def save_batch_checkpoint(checkpoint):
+    BATCH_CHECKPOINT.parent.mkdir(parents=True, exist_ok=True)
+    tmp = BATCH_CHECKPOINT.with_suffix(".tmp")
+    with open(tmp, "w") as f:
+        json.dump(checkpoint, f, indent=2)
+    os.replace(tmp, BATCH_CHECKPOINT)
 
-    # Find candidates for backfill
-    candidates = []
-    for poll in polls:
-        missing_count = sum(1 for c in CANDIDATES if poll.get(c) is None)
-        if missing_count < args.min_missing:
+
+def fallback_requests(plan, filled, polls_by_id):
+    """Second-round web searches for polls whose PDF parse found none of their missing numbers,
+    as the interactive path falls back to strategy 3. Returns (requests, plan) like
+    build_batch_requests."""
+    batch_requests, fallback_plan = [], {}
+    for custom_id, step in plan.items():
+        poll = polls_by_id.get(step["poll_id"])
+        if step["kind"] != "pdf_parse" or poll is None or found_count(filled.get(custom_id), step["missing"]):
             continue
-        if args.pollster and args.pollster.lower() not in poll["pollster"].lower():
+        fallback_id = f"fallback-{custom_id}"
+        batch_requests.append({"custom_id": fallback_id, "params": poll_search_request(poll, step["missing"])})
+        fallback_plan[fallback_id] = {"poll_id": step["poll_id"], "kind": "poll_search", "missing": step["missing"]}
+    return batch_requests, fallback_plan
+
+
+def submit_batch(batches, checkpoint, batch_requests, plan):
+    batch = batches.create(requests=batch_requests)
+    checkpoint["rounds"].append({"batch_id": batch.id, "submitted": datetime.utcnow().isoformat(), "plan": plan})
+    save_batch_checkpoint(checkpoint)
+    print(f"Submitted batch {batch.id} (round {len(checkpoint['rounds'])}) with {len(batch_requests)} requests")
+
+
+def batch_error_type(result):
+    """The API error type of an errored batch result ("invalid_request_error", ...), else None."""
+    error = getattr(getattr(result, "error", None), "error", None)
+    return getattr(error, "type", None)
+
+
+def collect_batch(batches, batch_round, poll_interval, filled, errors):
+    """Wait for one submitted batch to end and read its results into filled/errors."""
+    while True:
+        batch = batches.retrieve(batch_round["batch_id"])
+        if batch.processing_status == "ended":
+            break
+        counts = batch.request_counts
+        print(f"  Batch {batch.id}: {counts.processing} processing, {counts.succeeded} succeeded, {counts.errored} errored")
+        time.sleep(poll_interval)
+
+    for entry in batches.results(batch_round["batch_id"]):
+        step = batch_round["plan"].get(entry.custom_id)
+        if step is None:
             continue
-        if not any(pf.lower() in poll["pollster"].lower() for pf in FULL_FIELD_POLLSTERS):
+        if entry.result.type != "succeeded":
+            print(f"  {entry.custom_id}: {entry.result.type}")
+            METRICS.record_strategy(f"batch_{step['kind']}", False)
+            # A request the API rejected will be rejected again; count it as empty
+            if batch_error_type(entry.result) != "invalid_request_error":
+                errors[entry.custom_id] = entry.result.type
             continue
-        candidates.append((missing_count, poll))
+        METRICS.record_message(step["kind"], entry.result.message, batch=True)
+        read = read_pdf_parse if step["kind"] == "pdf_parse" else read_poll_search
+        try:
+            data = read(entry.result.message)
+        except Exception as e:
+            print(f"  {entry.custom_id}: unreadable reply: {e}")
+            data = None
+        METRICS.record_strategy(f"batch_{step['kind']}", found_count(data, step["missing"]) > 0)
+        if data:
+            filled[entry.custom_id] = data
+
+
+def run_batch(client, candidates, workers=1, poll_interval=BATCH_POLL_INTERVAL):
+    """Backfill candidates with Message Batches (or resume the checkpointed ones).
+
+    Round 1 is one request per poll (build_batch_requests). Polls whose PDF parse
+    found nothing get a web search in round 2, so batch mode tries the same
+    strategies as the interactive path except PDF-URL discovery. Each round is
+    checkpointed when submitted. Returns (plan, filled, errors) over both rounds:
+    filled maps custom_id -> parsed candidate numbers, errors maps custom_id -> why
+    a request failed in a way worth retrying (errored other than an invalid
+    request, expired, canceled).
+    """
+    # Batch endpoints bypass the rate limiter, so they keep the SDK's own retries
+    batches = client.with_options(max_retries=BATCH_API_RETRIES).messages.batches
+    checkpoint = load_batch_checkpoint()
+    if checkpoint and "rounds" not in checkpoint:
+        checkpoint = {"rounds": [checkpoint]}  # written before batches had rounds
+    if checkpoint:
+        for i, batch_round in enumerate(checkpoint["rounds"], 1):
+            print(f"Resuming batch {batch_round['batch_id']} (round {i}, {len(batch_round['plan'])} requests, "
+                  f"submitted {batch_round['submitted']})")
+    else:
+        checkpoint = {"rounds": []}
+        submit_batch(batches, checkpoint, *build_batch_requests(candidates, workers))
+
+    plan, filled, errors = {}, {}, {}
+    collect_batch(batches, checkpoint["rounds"][0], poll_interval, filled, errors)
+    plan.update(checkpoint["rounds"][0]["plan"])
+    if len(checkpoint["rounds"]) == 1:
+        batch_requests, fallback_plan = fallback_requests(plan, filled, {p["id"]: p for _, p in candidates if "id" in p})
+        if batch_requests:
+            print(f"{len(batch_requests)} PDF parse(s) found nothing, falling back to web search")
+            submit_batch(batches, checkpoint, batch_requests, fallback_plan)
+    if len(checkpoint["rounds"]) > 1:
+        collect_batch(batches, checkpoint["rounds"][1], poll_interval, filled, errors)
+        plan.update(checkpoint["rounds"][1]["plan"])
+    return plan, filled, errors
+
+
+def select_candidates(polls, min_missing, limit, pollster=None, ledger=None, now=None):
+    """[(missing count, poll)] worth backfilling, most missing first.
+
+    Whole-column ops on a PollMatrix; pollster filters run once per distinct pollster.
+    With a ledger, polls whose missing set is cooling down after an empty attempt
+    are skipped and ones that failed before rank behind fresh ones.
+    """
+    matrix = PollMatrix.from_polls(polls, CANDIDATES, with_crosstabs=False)
+    missing_counts = matrix.missing_for(CANDIDATES).sum(axis=1)
+    eligible = (missing_counts >= min_missing) & matrix.pollster_mask(
+        lambda name: any(pf.lower() in name.lower() for pf in FULL_FIELD_POLLSTERS))
+    if pollster:
+        eligible &= matrix.pollster_mask(lambda name: pollster.lower() in name.lower())
+
+    # Stable sort, so ties keep file order
+    order = [i for i in np.argsort(-missing_counts, kind="stable") if eligible[i]]
+    if ledger is not None:
+        tracked = {entry["poll_id"] for entry in ledger.entries.values()}
+        pruned = ledger.prune({ledger_key(p["id"], missing_candidates(p)) for p in polls if p.get("id") in tracked})
+        cooling = [i for i in order if ledger.cooling(polls[i].get("id"), missing_candidates(polls[i]), now)]
+        if cooling or pruned:
+            print(f"Ledger: skipping {len(cooling)} poll(s) cooling down after empty attempts, pruned {pruned} stale entries")
+        skip = set(cooling)
+        order = sorted((i for i in order if i not in skip),
+                       key=lambda i: ledger.failures(polls[i].get("id"), missing_candidates(polls[i])))
+    return [(int(missing_counts[i]), polls[i]) for i in order][:limit]
+
+
+def backfill(args):
+    client = make_client()
+    store = PollStore.open()
+    polls = store.polls()
+    print(f"Loaded {len(polls)} polls")
 
-    # Sort by most missing first
-    candidates.sort(key=lambda x: -x[0])
-    candidates = candidates[:args.limit]
+    ledger = BackfillLedger()
+    with METRICS.phase("select"):
+        candidates = select_candidates(polls, args.min_missing, args.limit, args.pollster,
+                                       ledger=None if args.retry_failed else ledger)
 
     print(f"\nFound {len(candidates)} polls to backfill:")
     for count, p in candidates:
         print(f"  {p['date']} {p['pollster']} ({p.get('state','National')}): {count} missing")
 
-    if not candidates:
+    if not candidates and not (args.batch and load_batch_checkpoint()):
         print("Nothing to backfill!")
         return
 
@@ -306,26 +646,106 @@ def main():
     updated_count = 0
     poll_index = {p["id"]: i for i, p in enumerate(polls) if "id" in p}
 
-    for _, poll in candidates:
-        result = backfill_poll(client, poll, min_missing=args.min_missing)
+    if args.batch:
+        with METRICS.phase("batch"):
+            plan, filled, errors = run_batch(client, candidates, workers=args.workers, poll_interval=args.batch_poll_interval)
+        # A poll can have two requests (PDF parse, then the web-search fallback); keep the better answer
+        by_poll = {}
+        for custom_id, step in plan.items():
+            data = filled.get(custom_id)
+            ledger.record_strategy(step["poll_id"], step["missing"], BATCH_STRATEGIES[step["kind"]],
+                                   found_count(data, step["missing"]), error=errors.get(custom_id))
+            entry = by_poll.setdefault(step["poll_id"], {"missing": step["missing"], "data": None, "errored": False})
+            if data and (entry["data"] is None or found_count(data, step["missing"]) > found_count(entry["data"], step["missing"])):
+                entry["data"] = data
+            entry["errored"] |= custom_id in errors
+        results = []
+        for poll_id, entry in by_poll.items():
+            idx = poll_index.get(poll_id)
+            if idx is None:
+                continue
+            poll = polls[idx]
+            # Re-check against the current file so a resumed batch still only fills nulls
+            missing = [c for c in entry["missing"] if poll.get(c) is None]
+            result = apply_filled(poll, missing, entry["data"]) if entry["data"] else None
+            ledger.finish(poll_id, entry["missing"], result is not None, errored=entry["errored"])
+            results.append((poll, result))
+    else:
+        # Workers share LIMITER; results come back in candidate order so writes are deterministic
+        with METRICS.phase("backfill"), ThreadPoolExecutor(max_workers=max(1, args.workers)) as pool:
+            results = list(zip(
+                [poll for _, poll in candidates],
+                pool.map(lambda item: backfill_poll(client, item[1], min_missing=args.min_missing, ledger=ledger), candidates),
+            ))
+    METRICS.count("polls_filled", sum(1 for _, result in results if result))
+
+    for poll, result in results:
         if result:
             if not args.dry_run:
                 # Update in place
                 idx = poll_index.get(poll.get("id"))
                 if idx is not None:
                     polls[idx] = result
+                    store.put(result)  # logs just the changed fields
                 updated_count += 1
             else:
                 print(f"    [DRY RUN] Would update poll")
 
     if not args.dry_run and updated_count > 0:
-        save_polls(polls)
+        with METRICS.phase("write"):
+            store.maybe_compact()
+            store.export()
+            shard_export.write_artifacts(polls)
         print(f"\n✓ Updated {updated_count} polls. Saved to {POLLS_FILE}")
     elif args.dry_run:
         print(f"\n[DRY RUN] Would have updated {updated_count} polls")
     else:
         print(f"\nNo polls needed updating")
 
+    # Dry runs change nothing and replay runs see only recorded answers, so neither updates the ledger
+    if not args.dry_run and not args.replay:
+        ledger.save()
+
+    # A dry run keeps the checkpoint so a real run can apply the same batch results
+    if args.batch and not args.dry_run:
+        BATCH_CHECKPOINT.unlink(missing_ok=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill missing poll data")
+    parser.add_argument("--min-missing", type=int, default=3, help="Minimum missing candidates to trigger backfill (default: 3)")
+    parser.add_argument("--limit", type=int, default=20, help="Max polls to process (default: 20)")
+    parser.add_argument("--pollster", type=str, default=None, help="Only backfill a specific pollster")
+    parser.add_argument("--dry-run", action="store_true", help="Don't save changes, just show what would be updated")
+    parser.add_argument("--workers", type=int, default=1, help="Polls to backfill concurrently (default: 1)")
+    parser.add_argument("--rpm", type=int, default=DEFAULT_RPM, help=f"API requests per minute across all workers (default: {DEFAULT_RPM})")
+    parser.add_argument("--tpm", type=int, default=DEFAULT_TPM, help=f"API input tokens per minute across all workers (default: {DEFAULT_TPM})")
+    parser.add_argument("--replay", action="store_true", help="Serve model calls only from the LLM cache (no API traffic)")
+    parser.add_argument("--batch", action="store_true", help="Submit the requests as Message Batches: PDF parses and web searches, then a web-search "
+                             "round for empty PDF parses (no PDF-URL search; resumes an interrupted batch)")
+    parser.add_argument("--batch-poll-interval", type=float, default=BATCH_POLL_INTERVAL, help=f"Seconds between batch status checks (default: {BATCH_POLL_INTERVAL})")
+    parser.add_argument("--retry-failed", action="store_true", help="Ignore the attempt ledger's cooldowns when picking polls")
+    parser.add_argument("--metrics-file", type=Path, default=METRICS_FILE, help=f"Where to write run metrics (default: {METRICS_FILE})")
+    parser.add_argument("--profile", action="store_true", help="Dump cProfile stats of the main thread to .cache/backfill_polls.prof")
+    args = parser.parse_args()
+
+    if args.replay:
+        llm_cache.set_replay(True)
+        os.environ.setdefault("ANTHROPIC_API_KEY", "replay")
+
+    global LIMITER
+    LIMITER = RateLimiter(rpm=args.rpm, tpm=args.tpm)
+
+    print(f"=== Poll Backfiller {datetime.utcnow().isoformat()} UTC ===")
+    print(f"Min missing: {args.min_missing} | Limit: {args.limit} | Workers: {args.workers} | Dry run: {args.dry_run}")
+
+    # Metrics are written even when the run fails, so a slow or broken run still leaves evidence
+    try:
+        with profiled(args.profile, "backfill_polls"):
+            backfill(args)
+    finally:
+        METRICS.write(args.metrics_file, script="backfill_polls", replay=args.replay, batch=args.batch)
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,220 @@
+"""
+benchmark.py - How the data-path functions scale with the number of polls.
+
+Times validate, existing_keys, merge, load_existing (opening the poll store),
+the polls.json rewrite, backfill candidate selection, the PollMatrix build,
+aggregates and trends on seeded synthetic polls (synth_polls.py) at several
+sizes, with and without crosstabs. Each case reports the best of --repeat
+wall times, peak traced memory (tracemalloc, measured in a separate run so it
+does not skew the timings) and a scaling exponent: the slope of log(time)
+against log(polls), ~1.0 for linear, ~2.0 for quadratic.
+
+Results are written as JSON. With --baseline, exponents are compared with a
+stored run and the script exits 1 if any case scales worse by more than
+EXPONENT_TOLERANCE. Exponents, unlike raw times, are comparable across
+machines; raw times more than TIME_TOLERANCE slower are reported as warnings.
+
+    python scripts/benchmark.py --sizes 1000 10000 100000
+    python scripts/benchmark.py --save-baseline
+    python scripts/benchmark.py --baseline .cache/benchmark/baseline.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import math
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+os.environ.setdefault("ANTHROPIC_API_KEY", "benchmark")  # imported modules never call the API here
+
+import aggregate
+import backfill_polls
+import fetch_polls
+from paths import CACHE_ROOT
+import poll_format
+from poll_matrix import PollMatrix
+from poll_store import PollStore
+import synth_polls
+import trend
+
+BENCH_DIR = CACHE_ROOT / "benchmark"
+RESULTS_FILE = BENCH_DIR / "latest.json"
+BASELINE_FILE = BENCH_DIR / "baseline.json"
+
+DEFAULT_SIZES = [1000, 10000, 100000]
+DEFAULT_REPEAT = 3
+MERGE_BATCH = 200           # new polls per merge, a generous day's haul
+EXPONENT_TOLERANCE = 0.25
+TIME_TOLERANCE = 2.0
+MIN_COMPARE_SECONDS = 0.005  # below this at the largest size, timer noise swamps the exponent
+
+
+class Workdir:
+    """Temp directory holding a poll store and polls.json seeded with the benchmark polls."""
+
+    def __init__(self, polls):
+        self.path = Path(tempfile.mkdtemp(prefix="poll-bench-"))
+        self.polls_file = self.path / "polls.json"
+        self.polls_file.write_text(poll_format.dumps(polls))
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.store = PollStore.open(self.path / "data", self.polls_file)
+
+    def open_store(self):
+        return PollStore.open(self.path / "data", self.polls_file).polls()
+
+    def close(self):
+        shutil.rmtree(self.path, ignore_errors=True)
+
+
+def cases(polls, workdir):
+    """(name, setup, run): setup() builds fresh arguments, run(*args) is what gets timed."""
+    new_batch = synth_polls.generate(MERGE_BATCH // 2, seed=len(polls) + 1) + \
+        synth_polls.near_duplicates(polls, MERGE_BATCH // 2, seed=len(polls))
+    none = lambda: ()
+    return [
+        ("validate", none, lambda: fetch_polls.validate(polls)),
+        ("existing_keys", none, lambda: fetch_polls.existing_keys(polls)),
+        ("merge", lambda: (list(polls), [dict(p) for p in new_batch]),
+         lambda existing, new: fetch_polls.merge(existing, new)),
+        ("load_existing", none, workdir.open_store),
+        ("export_polls_json", none, lambda: workdir.store.export(workdir.path / "export.json")),
+        ("backfill_selection", none, lambda: backfill_polls.select_candidates(polls, 3, 20)),
+        ("poll_matrix", none, lambda: PollMatrix.from_polls(polls, aggregate.CANDIDATES)),
+        ("aggregates", none, lambda: aggregate.compute_aggregates(polls)),
+        ("trends", none, lambda: trend.build_trends(polls)),
+    ]
+
+
+def measure(setup, run, repeat):
+    """(best wall seconds, peak traced bytes)."""
+    best = math.inf
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(repeat):
+            args = setup()
+            start = time.perf_counter()
+            run(*args)
+            best = min(best, time.perf_counter() - start)
+        args = setup()
+        tracemalloc.start()
+        try:
+            run(*args)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+    return best, peak
+
+
+def scaling_exponent(points):
+    """Slope of log(seconds) vs log(size) over [(size, seconds)], or None."""
+    points = [(n, t) for n, t in points if t > 0]
+    if len(points) < 2:
+        return None
+    slope, _ = np.polyfit([math.log(n) for n, _ in points], [math.log(t) for _, t in points], 1)
+    return round(float(slope), 3)
+
+
+def run_benchmarks(sizes, repeat, seed):
+    results = []
+    for crosstabs in (False, True):
+        for size in sizes:
+            polls = synth_polls.generate(size, seed=seed, crosstabs=crosstabs)
+            polls.sort(key=lambda p: p["date"], reverse=True)
+            workdir = Workdir(polls)
+            try:
+                for name, setup, run in cases(polls, workdir):
+                    seconds, peak = measure(setup, run, repeat)
+                    results.append({"name": name, "crosstabs": crosstabs, "size": size,
+                                    "seconds": round(seconds, 6), "peak_bytes": peak})
+                    print(f"  {name:<20} {'crosstabs' if crosstabs else 'toplines':<9} "
+                          f"{size:>7}  {seconds * 1000:10.1f} ms  {peak / 1e6:8.1f} MB")
+            finally:
+                workdir.close()
+    return results
+
+
+def summarize(results):
+    """{"name/crosstabs": {"exponent": ..., "seconds": {size: s}, "peak_bytes": {size: b}}}."""
+    summary = {}
+    for r in results:
+        key = f"{r['name']}/{'crosstabs' if r['crosstabs'] else 'toplines'}"
+        entry = summary.setdefault(key, {"seconds": {}, "peak_bytes": {}})
+        entry["seconds"][str(r["size"])] = r["seconds"]
+        entry["peak_bytes"][str(r["size"])] = r["peak_bytes"]
+    for entry in summary.values():
+        entry["exponent"] = scaling_exponent([(int(n), t) for n, t in entry["seconds"].items()])
+    return summary
+
+
+def compare(summary, baseline):
+    """Print differences from a baseline summary; return the keys that scale worse."""
+    regressions = []
+    print(f"\n{'case':<32} {'exponent':>9} {'baseline':>9}")
+    for key, entry in summary.items():
+        base = baseline.get(key)
+        if base is None:
+            print(f"{key:<32} {entry['exponent']!s:>9} {'(new)':>9}")
+            continue
+        flag = ""
+        largest = entry["seconds"][max(entry["seconds"], key=int)]
+        if entry["exponent"] is not None and base["exponent"] is not None and largest >= MIN_COMPARE_SECONDS \
+                and entry["exponent"] - base["exponent"] > EXPONENT_TOLERANCE:
+            flag = "  SCALING REGRESSION"
+            regressions.append(key)
+        print(f"{key:<32} {entry['exponent']!s:>9} {base['exponent']!s:>9}{flag}")
+        for size, seconds in entry["seconds"].items():
+            before = base["seconds"].get(size)
+            if before and seconds / before > TIME_TOLERANCE:
+                print(f"    warning: {seconds / before:.1f}x slower at {size} polls ({before:.4f}s -> {seconds:.4f}s)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark data-path functions against synthetic polls")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help=f"Poll counts (default: {DEFAULT_SIZES})")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help=f"Timed runs per case, best is kept (default: {DEFAULT_REPEAT})")
+    parser.add_argument("--seed", type=int, default=0, help="Synthetic poll seed (default: 0)")
+    parser.add_argument("--output", type=Path, default=RESULTS_FILE, help=f"Results JSON (default: {RESULTS_FILE})")
+    parser.add_argument("--baseline", type=Path, default=None, help="Compare against this results JSON")
+    parser.add_argument("--save-baseline", action="store_true", help=f"Also write the results to {BASELINE_FILE}")
+    args = parser.parse_args()
+
+    print(f"=== Benchmark {datetime.utcnow().isoformat()} UTC | sizes {args.sizes} | repeat {args.repeat} ===")
+    results = run_benchmarks(sorted(args.sizes), args.repeat, args.seed)
+    report = {
+        "generated": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "seed": args.seed,
+        "repeat": args.repeat,
+        "results": results,
+        "summary": summarize(results),
+    }
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps(report, indent=2))
+    print(f"\nWrote {args.output}")
+    if args.save_baseline:
+        BASELINE_FILE.parent.mkdir(parents=True, exist_ok=True)
+        BASELINE_FILE.write_text(json.dumps(report, indent=2))
+        print(f"Saved baseline to {BASELINE_FILE}")
+
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text())
+        regressions = compare(report["summary"], baseline["summary"])
+        if regressions:
+            print(f"\n{len(regressions)} case(s) scale worse than the baseline")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
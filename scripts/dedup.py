@@ -0,0 +1,149 @@
+"""
+dedup.py - Fuzzy duplicate detection for merge().
+
+Exact (pollster, date, state) matches miss "Emerson College" vs "Emerson
+College Polling", or a fielding date vs a release date a day later. Comparing
+every pair would be O(n^2), so polls are blocked by state and kept sorted by
+date; a new poll is only scored against polls in its state within
+DATE_WINDOW_DAYS (found with bisect). Pollster names are canonicalized through
+POLLSTER_ALIASES first. Each candidate pair is scored on pollster similarity,
+sample size, topline vector and date distance:
+
+    score >= DUPLICATE_SCORE  -> merged (the new poll is dropped)
+    score >= FLAG_SCORE       -> flagged (added, but listed in the report)
+"""
+import bisect
+import difflib
+import re
+from datetime import date
+
+DATE_WINDOW_DAYS = 3
+DUPLICATE_SCORE = 0.85
+FLAG_SCORE = 0.7
+
+# Canonical name -> spellings seen in the wild (after normalize_pollster)
+POLLSTER_ALIASES = {
+    "emerson college": ["emerson", "emerson college polling", "emerson polling"],
+    "unh survey center": ["unh", "university of new hampshire", "unh granite state poll", "granite state poll"],
+    "harvard harris": ["harvard caps harris", "harvard harris poll", "harris harvard", "harvard caps"],
+    "j l partners": ["jl partners", "j l partners daily mail", "daily mail j l partners"],
+    "yougov": ["yougov economist", "economist yougov", "yougov cbs news", "cbs news yougov"],
+    "morning consult": ["morning consult politico"],
+    "echelon insights": ["echelon"],
+    "suffolk university": ["suffolk", "suffolk usa today", "usa today suffolk"],
+    "quinnipiac": ["quinnipiac university"],
+    "des moines register": ["des moines register selzer", "selzer", "selzer and co"],
+    "yale youth poll": ["yale youth", "yale"],
+    "franklin and marshall": ["franklin marshall", "f m poll"],
+    "mclaughlin and associates": ["mclaughlin"],
+}
+
+NOISE_WORDS = {"the", "poll", "polls", "polling", "inc", "llc", "co"}
+
+
+def normalize_pollster(name):
+    text = re.sub(r"[^a-z0-9]+", " ", name.lower().replace("&", " and "))
+    return " ".join(w for w in text.split() if w not in NOISE_WORDS) or text.strip()
+
+
+_CANONICAL = {normalize_pollster(alias): canonical
+              for canonical, aliases in POLLSTER_ALIASES.items() for alias in aliases + [canonical]}
+
+
+def canonical_pollster(name):
+    normalized = normalize_pollster(name)
+    return _CANONICAL.get(normalized, normalized)
+
+
+def _ordinal(iso):
+    try:
+        return date.fromisoformat(iso).toordinal()
+    except (TypeError, ValueError):
+        return None
+
+
+def _number(value):
+    return value if isinstance(value, (int, float)) and not isinstance(value, bool) else None
+
+
+class DedupIndex:
+    """Polls blocked by state, each block sorted by date for bisect window lookups."""
+
+    def __init__(self, polls, candidates):
+        self.candidates = candidates
+        self.blocks = {}
+        self.keys = {}
+        for poll in polls:
+            self.add(poll)
+
+    @staticmethod
+    def _state(poll):
+        return (poll.get("state") or "National").lower()
+
+    @staticmethod
+    def exact_key(poll):
+        return (poll["pollster"].lower().strip(), poll["date"], (poll.get("state") or "National").lower())
+
+    def add(self, poll):
+        self.keys.setdefault(self.exact_key(poll), poll)
+        day = _ordinal(poll.get("date"))
+        if day is None:
+            return
+        dates, polls = self.blocks.setdefault(self._state(poll), ([], []))
+        i = bisect.bisect_right(dates, day)
+        dates.insert(i, day)
+        polls.insert(i, (canonical_pollster(poll["pollster"]), poll))
+
+    def score(self, poll, canonical, other_canonical, other):
+        if canonical == other_canonical:
+            pollster = 1.0
+        else:
+            pollster = difflib.SequenceMatcher(None, canonical, other_canonical).ratio()
+
+        a, b = _number(poll.get("sampleSize")), _number(other.get("sampleSize"))
+        sample = 1 - abs(a - b) / max(a, b) if a and b else 0.5
+
+        shared = [(poll[c], other[c]) for c in self.candidates
+                  if _number(poll.get(c)) is not None and _number(other.get(c)) is not None]
+        if shared:
+            mean_diff = sum(abs(x - y) for x, y in shared) / len(shared)
+            topline = max(0.0, 1 - mean_diff / 5)
+        else:
+            topline = 0.5
+
+        days = abs(_ordinal(poll["date"]) - _ordinal(other["date"]))
+        closeness = 1 - days / (DATE_WINDOW_DAYS + 1)
+
+        return 0.45 * pollster + 0.15 * sample + 0.3 * topline + 0.1 * closeness
+
+    def best_match(self, poll):
+        """(score, existing poll) for the closest poll in the same state and date window, or None."""
+        exact = self.keys.get(self.exact_key(poll))
+        if exact is not None:
+            return 1.0, exact
+        day = _ordinal(poll.get("date"))
+        block = self.blocks.get(self._state(poll))
+        if day is None or not block:
+            return None
+        dates, polls = block
+        lo = bisect.bisect_left(dates, day - DATE_WINDOW_DAYS)
+        hi = bisect.bisect_right(dates, day + DATE_WINDOW_DAYS)
+        canonical = canonical_pollster(poll["pollster"])
+        best = None
+        for other_canonical, other in polls[lo:hi]:
+            score = self.score(poll, canonical, other_canonical, other)
+            if best is None or score > best[0]:
+                best = (score, other)
+        return best
+
+    def classify(self, poll):
+        """("merged" | "flagged" | None, score, closest existing poll or None)."""
+        match = self.best_match(poll)
+        if match is None:
+            return None, 0.0, None
+        score, other = match
+        if score >= DUPLICATE_SCORE:
+            return "merged", score, other
+        if score >= FLAG_SCORE:
+            return "flagged", score, other
+        return None, score, other
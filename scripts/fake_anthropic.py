@@ -0,0 +1,474 @@
+"""
+fake_anthropic.py - Local stand-in for the Anthropic API and the sites the scripts scrape.
+
+Serves POST /v1/messages (as server-sent events when the request streams)
+and the Message Batches endpoints, so fetch_polls.py and backfill_polls.py
+(including --batch) run end to end without network or API credit:
+
+    python scripts/fake_anthropic.py --port 8787 &
+    ANTHROPIC_BASE_URL=http://127.0.0.1:8787 ANTHROPIC_API_KEY=fake \
+        python scripts/backfill_polls.py --batch --batch-poll-interval 1 --dry-run
+
+Replies are scripted with --script, a JSON object mapping a substring of the
+prompt to the reply (a string, or any JSON value which is sent serialized).
+Unscripted prompts are answered by kind: a PDF URL search gets a PDF URL on
+this server, a prompt listing candidate ids ("harris": number or null, ...)
+gets an object with those ids (null, or seeded numbers with --fill), a poll
+search or page extraction gets --polls-per-reply synthetic polls, anything
+else "[]". Replies are seeded by the prompt, so a rerun answers the same.
+
+Any other GET is a source site. With --fixtures DIR a file at the same path
+is served as is; otherwise .pdf paths get a generated toplines PDF and every
+other path a racetothewh-style page of poll tables (point RACETOTHEWH_URL or
+WIKIPEDIA_POLLS_URL at it). Pages carry an ETag, so conditional GETs get 304s.
+
+Faults for load testing (see load_harness.py): --latency/--jitter delay each
+message, --rate-limit-rate answers that fraction with a 429, --rpm enforces
+a rolling requests-per-minute limit with anthropic-ratelimit-* headers,
+--truncate-rate cuts that fraction of replies in half with stop_reason
+"max_tokens", and --stream-delay spaces out streamed text deltas.
+"""
+import argparse
+import collections
+import hashlib
+import itertools
+import json
+import random
+import re
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import synth_polls
+
+FIXTURE_TABLE_ROWS = 60
+FIXTURE_UNMAPPED_ROWS = 20
+FIXTURE_STATES = ["National", "New Hampshire", "Iowa", "South Carolina"]
+PDF_LINES_PER_PAGE = 50
+STREAM_CHUNK_CHARS = 40
+
+
+def _timestamp(seconds):
+    return datetime.fromtimestamp(seconds, timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+def prompt_text(params):
+    """Text of the last user message in a messages.create payload."""
+    for message in reversed(params.get("messages", [])):
+        if message.get("role") != "user":
+            continue
+        content = message.get("content", "")
+        if isinstance(content, str):
+            return content
+        return "".join(block.get("text", "") for block in content if isinstance(block, dict))
+    return ""
+
+
+def seeded_rng(seed, text):
+    return random.Random(f"{seed}:{hashlib.sha1(text.encode('utf-8')).hexdigest()}")
+
+
+def synthetic_polls(rng, n):
+    """n polls in fetch_polls' SYSTEM_PROMPT schema (no id, no crosstabs)."""
+    polls = []
+    for _ in range(n):
+        poll = synth_polls.make_poll(rng, crosstabs=False)
+        del poll["id"]
+        poll["type"] = poll["state"]
+        polls.append(poll)
+    return polls
+
+
+def fixture_html(seed=0, rows=FIXTURE_TABLE_ROWS, unmapped=FIXTURE_UNMAPPED_ROWS, base_url=""):
+    """A racetothewh-style page: one poll table per state, each with a header row,
+    mappable rows (linking to PDFs on base_url) and rows whose date cell the
+    deterministic parser cannot read, so they go to the model."""
+    rng = random.Random(seed)
+    cands = synth_polls.CANDIDATES[:12]
+    header = "<tr><th>Pollster</th><th>Dates</th><th>Sample</th>" + "".join(f"<th>{c.title()}</th>" for c in cands) + "</tr>"
+    parts = ["<html><body><h1>2028 Democratic Primary Polls</h1>"]
+    for s, state in enumerate(FIXTURE_STATES):
+        parts.append(f"<h2>{state} 2028 Democratic Primary</h2><table>{header}")
+        for k in range(s, rows + unmapped, len(FIXTURE_STATES)):
+            poll = synth_polls.make_poll(rng, crosstabs=False)
+            when = poll["date"] if k < rows else f"Fielded {rng.choice(['early', 'mid', 'late'])} month, TBD"
+            link = f'<a href="{base_url}/pdf/{poll["id"]}.pdf">{poll["pollster"]}</a>'
+            cells = "".join(f"<td>{'' if poll[c] is None else poll[c]}</td>" for c in cands)
+            parts.append(f"<tr><td>{link}</td><td>{when}</td><td>{poll['sampleSize']}</td>{cells}</tr>")
+        parts.append("</table>")
+    parts.append("</body></html>")
+    return "\n".join(parts)
+
+
+def _pdf_escape(text):
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def fixture_pdf(lines):
+    """A minimal text-only PDF (Helvetica, PDF_LINES_PER_PAGE lines a page) that pdfplumber can read."""
+    pages = [lines[i:i + PDF_LINES_PER_PAGE] for i in range(0, len(lines), PDF_LINES_PER_PAGE)] or [[]]
+    font = 3 + 2 * len(pages)
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>",
+               f"<< /Type /Pages /Kids [{' '.join(f'{3 + 2 * i} 0 R' for i in range(len(pages)))}] /Count {len(pages)} >>"]
+    for i, page in enumerate(pages):
+        stream = "BT /F1 10 Tf 12 TL 50 760 Td " + " ".join(f"({_pdf_escape(line)}) Tj T*" for line in page) + " ET"
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                       f"/Resources << /Font << /F1 {font} 0 R >> >> /Contents {4 + 2 * i} 0 R >>")
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+    objects.append("<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+    out, offsets = bytearray(b"%PDF-1.4\n"), []
+    for n, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += f"{n} 0 obj\n{body}\nendobj\n".encode("latin-1")
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("latin-1")
+    out += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode("latin-1")
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode("latin-1")
+    return bytes(out)
+
+
+def toplines_pdf(seed, name):
+    """Toplines release for one poll: a header, two pages of filler, then a line per candidate."""
+    rng = seeded_rng(seed, name)
+    poll = synth_polls.make_poll(rng, crosstabs=False)
+    lines = [f"{poll['pollster']} Poll", f"{poll['state']} 2028 Democratic Presidential Primary",
+             f"Fielded {poll['date']}, n={poll['sampleSize']} likely primary voters", ""]
+    lines += [f"Q{q}. Methodology and question wording, item {q}." for q in range(1, 2 * PDF_LINES_PER_PAGE)]
+    lines += ["If the 2028 Democratic primary were held today, who would you vote for?"]
+    lines += [f"{c.title()} {max(0, round(rng.gauss(synth_polls.popularity(c), 2)))}%" for c in synth_polls.CANDIDATES]
+    return fixture_pdf(lines)
+
+
+class FakeAnthropic:
+    """In-memory API state shared by all request handler threads."""
+
+    def __init__(self, script=None, batch_seconds=2.0, latency=0.0, jitter=0.0, rate_limit_rate=0.0,
+                 retry_after=1.0, rpm=None, truncate_rate=0.0, fill=False, polls_per_reply=0,
+                 fixtures=None, page_latency=0.0, stream_delay=0.0, seed=0):
+        self.script = script or {}
+        self.batch_seconds = batch_seconds
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.rpm = rpm
+        self.truncate_rate = truncate_rate
+        self.fill = fill
+        self.polls_per_reply = polls_per_reply
+        self.fixtures = Path(fixtures) if fixtures else None
+        self.page_latency = page_latency
+        self.stream_delay = stream_delay
+        self.seed = seed
+        self.batches = {}
+        self.ids = itertools.count(1)
+        self.lock = threading.Lock()
+        self.rng = random.Random(seed)  # fault injection; guarded by lock
+        self.recent = collections.deque()  # message timestamps in the last minute, for --rpm
+        self.stats = collections.Counter()
+        self.latencies = []
+
+    def reply_text(self, params, base_url=""):
+        prompt = prompt_text(params)
+        for needle, reply in self.script.items():
+            if needle in prompt:
+                return reply if isinstance(reply, str) else json.dumps(reply)
+        rng = seeded_rng(self.seed, prompt)
+        if "Find the direct PDF URL" in prompt:
+            return f"{base_url}/pdf/{hashlib.sha1(prompt.encode('utf-8')).hexdigest()[:12]}.pdf"
+        ids = re.findall(r'"(\w+)": number or null', prompt)
+        if ids:
+            return json.dumps({c: round(rng.uniform(0, 30)) if self.fill else None for c in ids})
+        if self.polls_per_reply and "JSON array" in (params.get("system") or "") + prompt:
+            return json.dumps(synthetic_polls(rng, self.polls_per_reply))
+        return "[]"
+
+    def message(self, params, base_url=""):
+        text = self.reply_text(params, base_url)
+        stop_reason = "end_turn"
+        with self.lock:
+            truncate = self.rng.random() < self.truncate_rate
+        if truncate:
+            text, stop_reason = text[:len(text) // 2], "max_tokens"
+        searches = sum(1 for tool in params.get("tools") or [] if tool.get("name") == "web_search")
+        return {
+            "id": f"msg_local_{next(self.ids)}",
+            "type": "message",
+            "role": "assistant",
+            "model": params.get("model", "fake"),
+            "content": [{"type": "text", "text": text}],
+            "stop_reason": stop_reason,
+            "stop_sequence": None,
+            "usage": {"input_tokens": len(prompt_text(params)) // 4 + 1, "output_tokens": len(text) // 4 + 1,
+                      "server_tool_use": {"web_search_requests": searches}},
+        }
+
+    def admit(self):
+        """(status, headers) for a new message request: 200, or 429 when rate limited."""
+        now = time.time()
+        with self.lock:
+            while self.recent and now - self.recent[0] >= 60:
+                self.recent.popleft()
+            if self.rpm and len(self.recent) >= self.rpm:
+                wait = 60 - (now - self.recent[0])
+                return 429, {"retry-after": f"{wait:.1f}", "anthropic-ratelimit-requests-remaining": "0",
+                             "anthropic-ratelimit-requests-reset": _timestamp(now + wait)}
+            if self.rng.random() < self.rate_limit_rate:
+                return 429, {"retry-after": str(self.retry_after)}
+            self.recent.append(now)
+            headers = {}
+            if self.rpm:
+                headers = {"anthropic-ratelimit-requests-limit": str(self.rpm),
+                           "anthropic-ratelimit-requests-remaining": str(self.rpm - len(self.recent)),
+                           "anthropic-ratelimit-requests-reset": _timestamp(self.recent[0] + 60)}
+            return 200, headers
+
+    def delay(self):
+        with self.lock:
+            seconds = max(0.0, self.rng.gauss(self.latency, self.jitter)) if self.latency else 0.0
+        if seconds:
+            time.sleep(seconds)
+
+    def record(self, kind, seconds=None):
+        with self.lock:
+            self.stats[kind] += 1
+            if seconds is not None:
+                self.latencies.append(seconds)
+
+    def page(self, path, base_url):
+        """(body, content type) for a source-site GET."""
+        if self.fixtures is not None:
+            candidate = (self.fixtures / path.lstrip("/")).resolve()
+            if candidate.is_file() and self.fixtures.resolve() in candidate.parents:
+                kind = "application/pdf" if candidate.suffix == ".pdf" else "text/html; charset=utf-8"
+                return candidate.read_bytes(), kind
+        if path.endswith(".pdf"):
+            return toplines_pdf(self.seed, path), "application/pdf"
+        return fixture_html(self.seed, base_url=base_url).encode("utf-8"), "text/html; charset=utf-8"
+
+    def create_batch(self, body):
+        batch_id = f"msgbatch_local_{next(self.ids)}"
+        with self.lock:
+            self.batches[batch_id] = {"created": time.time(), "requests": body.get("requests", [])}
+        return batch_id
+
+    def batch(self, batch_id, base_url):
+        with self.lock:
+            entry = self.batches.get(batch_id)
+        if entry is None:
+            return None
+        ended = time.time() - entry["created"] >= self.batch_seconds
+        count = len(entry["requests"])
+        return {
+            "id": batch_id,
+            "type": "message_batch",
+            "processing_status": "ended" if ended else "in_progress",
+            "request_counts": {
+                "processing": 0 if ended else count,
+                "succeeded": count if ended else 0,
+                "errored": 0, "canceled": 0, "expired": 0,
+            },
+            "created_at": _timestamp(entry["created"]),
+            "expires_at": _timestamp(entry["created"] + timedelta(days=1).total_seconds()),
+            "ended_at": _timestamp(entry["created"] + self.batch_seconds) if ended else None,
+            "cancel_initiated_at": None,
+            "archived_at": None,
+            "results_url": f"{base_url}/v1/messages/batches/{batch_id}/results" if ended else None,
+        }
+
+    def batch_results(self, batch_id, base_url=""):
+        with self.lock:
+            requests = list(self.batches[batch_id]["requests"])
+        return "".join(
+            json.dumps({
+                "custom_id": r["custom_id"],
+                "result": {"type": "succeeded", "message": self.message(r["params"], base_url)},
+            }) + "\n"
+            for r in requests
+        )
+
+    def summary(self):
+        """Counts of what was served, plus p50/p99 of message handling time (injected latency included)."""
+        with self.lock:
+            ordered = sorted(self.latencies)
+            stats = dict(self.stats)
+        pick = lambda q: round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 4) if ordered else None
+        return {**stats, "message_p50": pick(0.50), "message_p99": pick(0.99)}
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    @property
+    def fake(self):
+        return self.server.fake
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body, content_type="application/json", headers=None):
+        data = body if isinstance(body, bytes) else (body if isinstance(body, str) else json.dumps(body)).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _not_found(self):
+        self._send(404, {"type": "error", "error": {"type": "not_found_error", "message": self.path}})
+
+    def _body(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def do_POST(self):
+        path = self.path.split("?")[0]
+        if path == "/v1/messages":
+            self._messages()
+        elif path == "/v1/messages/batches":
+            batch_id = self.fake.create_batch(self._body())
+            self._send(200, self.fake.batch(batch_id, self._base_url()))
+        else:
+            self._not_found()
+
+    def _messages(self):
+        start = time.perf_counter()
+        params = self._body()
+        self.fake.delay()
+        status, headers = self.fake.admit()
+        if status == 429:
+            self.fake.record("rate_limited", time.perf_counter() - start)
+            return self._send(429, {"type": "error", "error": {"type": "rate_limit_error", "message": "Rate limited (fake)"}},
+                              headers=headers)
+        message = self.fake.message(params, self._base_url())
+        self.fake.record("truncated" if message["stop_reason"] == "max_tokens" else "messages", time.perf_counter() - start)
+        if params.get("stream"):
+            self._stream(message, headers)
+        else:
+            self._send(200, message, headers=headers)
+
+    def _stream(self, message, headers):
+        """Send a message as server-sent events, its text in STREAM_CHUNK_CHARS deltas."""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.close_connection = True
+
+        def event(kind, data):
+            self.wfile.write(f"event: {kind}\ndata: {json.dumps({'type': kind, **data})}\n\n".encode("utf-8"))
+            self.wfile.flush()
+
+        text = message["content"][0]["text"]
+        event("message_start", {"message": {**message, "content": [], "stop_reason": None,
+                                            "usage": {**message["usage"], "output_tokens": 1}}})
+        event("content_block_start", {"index": 0, "content_block": {"type": "text", "text": ""}})
+        for i in range(0, len(text), STREAM_CHUNK_CHARS):
+            if i and self.fake.stream_delay:
+                time.sleep(self.fake.stream_delay)
+            event("content_block_delta", {"index": 0, "delta": {"type": "text_delta", "text": text[i:i + STREAM_CHUNK_CHARS]}})
+        event("content_block_stop", {"index": 0})
+        event("message_delta", {"delta": {"stop_reason": message["stop_reason"], "stop_sequence": None},
+                                "usage": {"output_tokens": message["usage"]["output_tokens"]}})
+        event("message_stop", {})
+
+    def do_GET(self):
+        path = self.path.split("?")[0]
+        if not path.startswith("/v1/"):
+            return self._page(path)
+        m = re.fullmatch(r"/v1/messages/batches/([\w-]+)(/results)?", path)
+        if not m:
+            return self._not_found()
+        batch = self.fake.batch(m.group(1), self._base_url())
+        if batch is None:
+            return self._not_found()
+        if m.group(2):
+            self._send(200, self.fake.batch_results(m.group(1), self._base_url()), "application/binary")
+        else:
+            self._send(200, batch)
+
+    def _page(self, path):
+        if self.fake.page_latency:
+            time.sleep(self.fake.page_latency)
+        body, content_type = self.fake.page(path, self._base_url())
+        etag = f'"{hashlib.sha1(body).hexdigest()[:16]}"'
+        if self.headers.get("If-None-Match") == etag:
+            self.fake.record("not_modified")
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.fake.record("pdfs" if content_type == "application/pdf" else "pages")
+        self._send(200, body, content_type, headers={"ETag": etag})
+
+    def _base_url(self):
+        return f"http://{self.headers.get('Host')}"
+
+
+def serve(port=0, fake=None):
+    """Start the fake API on a background thread. Returns (server, base_url)."""
+    server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+    server.daemon_threads = True
+    server.fake = fake or FakeAnthropic()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def add_fault_arguments(parser):
+    """Fault-injection and reply options shared with load_harness.py."""
+    parser.add_argument("--latency", type=float, default=0.0, help="Mean seconds before each message reply")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Standard deviation of --latency")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Fraction of messages answered with a 429")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="retry-after seconds sent with injected 429s")
+    parser.add_argument("--rpm", type=int, default=None, help="Rolling requests-per-minute limit (429s above it)")
+    parser.add_argument("--truncate-rate", type=float, default=0.0, help="Fraction of replies cut short (stop_reason max_tokens)")
+    parser.add_argument("--fill", action="store_true", help="Answer candidate-number prompts with numbers instead of nulls")
+    parser.add_argument("--polls-per-reply", type=int, default=0, help="Synthetic polls in each poll search / extraction reply")
+    parser.add_argument("--fixtures", type=str, default=None, help="Directory of HTML/PDF files served for matching GET paths")
+    parser.add_argument("--page-latency", type=float, default=0.0, help="Seconds before each source page or PDF")
+    parser.add_argument("--stream-delay", type=float, default=0.0, help="Seconds between streamed text deltas")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for replies, fixtures and injected faults")
+
+
+def fake_from_args(args, script=None):
+    return FakeAnthropic(
+        script=script, batch_seconds=args.batch_seconds, latency=args.latency, jitter=args.jitter,
+        rate_limit_rate=args.rate_limit_rate, retry_after=args.retry_after, rpm=args.rpm,
+        truncate_rate=args.truncate_rate, fill=args.fill, polls_per_reply=args.polls_per_reply,
+        fixtures=args.fixtures, page_latency=args.page_latency, stream_delay=args.stream_delay, seed=args.seed,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for the Anthropic API")
+    parser.add_argument("--port", type=int, default=8787)
+    parser.add_argument("--script", type=str, default=None, help="JSON file mapping prompt substrings to replies")
+    parser.add_argument("--batch-seconds", type=float, default=2.0, help="Seconds before a submitted batch reports ended")
+    add_fault_arguments(parser)
+    args = parser.parse_args()
+
+    script = None
+    if args.script:
+        with open(args.script) as f:
+            script = json.load(f)
+
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), Handler)
+    server.daemon_threads = True
+    server.fake = fake_from_args(args, script)
+    print(f"Fake Anthropic API on http://127.0.0.1:{args.port} (racetothewh page: /president/2028/dem)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -1,21 +1,61 @@
 """
 fetch_polls.py - 2028 Democratic primary poll fetcher
-Phase 0: requests-based scrape of racetothewh.com/president/2028/dem
-Phase 1: Claude web search for anything the scrape misses
+Every due source in the sources.py registry runs concurrently:
+  racetothewh  scrape of racetothewh.com/president/2028/dem, parsed directly
+               from its HTML poll tables (Claude only for unmappable rows)
+  wikipedia    Wikipedia's nationwide primary polling tables
+  web_search   Claude web search for anything the scrapes miss
 Runs daily via GitHub Actions.
 """
-import anthropic
+import argparse
+import hashlib
+import html as htmllib
 import json
 import os
+import queue
 import re
-import time
-import requests
-from datetime import datetime
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from html.parser import HTMLParser
 from pathlib import Path
 
-POLLS_FILE = Path(__file__).parent.parent / "public" / "polls.json"
+import numpy as np
+
+from dedup import DedupIndex
+from json_stream import iter_array_items
+import llm_cache
+from paths import CACHE_ROOT
+from poll_matrix import PollMatrix
+from poll_store import PollStore
+from rate_limiter import RateLimiter, make_client
+from run_metrics import METRICS, METRICS_FILE, profiled
+import shard_export
+import sources
+
+ROW_STATE_FILE = CACHE_ROOT / "racetothewh_rows.json"
+DEDUP_REPORT_FILE = CACHE_ROOT / "dedup_report.json"
+RACETOTHEWH_URL = os.environ.get("RACETOTHEWH_URL", "https://www.racetothewh.com/president/2028/dem")
+WIKIPEDIA_URL = os.environ.get(
+    "WIKIPEDIA_POLLS_URL",
+    "https://en.wikipedia.org/wiki/Nationwide_opinion_polling_for_the_2028_Democratic_Party_presidential_primaries")
 START_DATE = "2025-01-01"
 
+# Model fallback for unmappable rows: overlapping chunks extracted concurrently
+CHUNK_CHARS = 8000
+CHUNK_OVERLAP_ROWS = 2
+CHUNK_MAX_TOKENS = 4000
+CHUNK_WORKERS = 4
+
+# Queue sentinel: one is put when each concurrent source finishes
+SOURCE_DONE = object()
+
+# Shared by every source that calls the model; synced from response headers
+LIMITER = RateLimiter(rpm=20, tpm=30000)
+
+# The fields SYSTEM_PROMPT asks the model to fill, so this follows the prompt's schema,
+# not aggregate.CANDIDATES (the tracker's list): new polls come in with these, and
+# backfill_polls.py fills in the rest of the tracker's candidates later.
 CANDIDATES = [
     "harris", "newsom", "buttigieg", "ocasio", "shapiro",
     "pritzker", "booker", "whitmer", "beshear", "kelly",
@@ -55,88 +95,405 @@ Return [] if nothing new found."""
 
 
 def load_existing():
-    if POLLS_FILE.exists():
-        with open(POLLS_FILE) as f:
-            return json.load(f)
-    return []
+    return PollStore.open().polls()
 
 
-def existing_keys(polls):
-    return {
-        (p["pollster"].lower().strip(), p["date"], p.get("state", "National").lower())
-        for p in polls
-    }
-
-
-def parse_json_response(raw):
-    """Safely extract JSON array from a response string."""
-    raw = re.sub(r"```json|```", "", raw).strip()
-    if "[" in raw:
-        raw = raw[raw.index("["):]
-    try:
-        result = json.loads(raw)
-        return result if isinstance(result, list) else []
-    except Exception as e:
-        print(f"  JSON parse error: {e}. Raw: {raw[:200]}")
-        return []
+def poll_key(p):
+    return (p["pollster"].lower().strip(), p["date"], (p.get("state") or "National").lower())
 
 
-def scrape_racetothewh():
-    """Phase 0: Fetch racetothewh.com with requests and extract polls via Claude."""
-    print("  [Phase 0] Fetching racetothewh.com with requests...")
+def existing_keys(polls):
+    return {poll_key(p) for p in polls}
+
+
+def strip_tags(fragment):
+    text = re.sub(r"<[^>]+>", " ", fragment)
+    return re.sub(r"\s+", " ", htmllib.unescape(text)).strip()
+
+
+class PollTableParser(HTMLParser):
+    """Single streaming pass over the page collecting every <table> as rows of cell text.
+
+    Each table remembers the last heading (h1-h4) seen before it, which is how
+    state-level tables are told apart from the national one.
+    """
+
+    HEADINGS = {"h1", "h2", "h3", "h4"}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.tables = []
+        self._heading = ""
+        self._heading_buf = None
+        self._table = None
+        self._depth = 0
+        self._row = None
+        self._cell = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.HEADINGS and self._table is None:
+            self._heading_buf = []
+        elif tag == "table":
+            self._depth += 1
+            if self._depth == 1:
+                self._table = {"heading": self._heading, "rows": []}
+        elif self._table is None or self._depth > 1:
+            return
+        elif tag == "tr":
+            self._end_row()
+            self._row = {"cells": [], "header": True, "href": None}
+        elif tag in ("td", "th") and self._row is not None:
+            self._end_cell()
+            self._cell = []
+            if tag == "td":
+                self._row["header"] = False
+        elif tag == "a" and self._row is not None and self._row["href"] is None:
+            self._row["href"] = dict(attrs).get("href")
+        elif tag == "br" and self._cell is not None:
+            self._cell.append(" ")
+
+    def handle_endtag(self, tag):
+        if tag in self.HEADINGS and self._heading_buf is not None:
+            self._heading = re.sub(r"\s+", " ", "".join(self._heading_buf)).strip()
+            self._heading_buf = None
+        elif tag == "table" and self._depth:
+            self._depth -= 1
+            if self._depth == 0:
+                self._end_row()
+                self.tables.append(self._table)
+                self._table = None
+        elif self._depth > 1:
+            return
+        elif tag in ("td", "th"):
+            self._end_cell()
+        elif tag == "tr":
+            self._end_row()
+
+    def handle_data(self, data):
+        if self._cell is not None:
+            self._cell.append(data)
+        elif self._heading_buf is not None:
+            self._heading_buf.append(data)
+
+    def _end_cell(self):
+        if self._cell is not None and self._row is not None:
+            self._row["cells"].append(re.sub(r"\s+", " ", "".join(self._cell)).strip())
+        self._cell = None
+
+    def _end_row(self):
+        self._end_cell()
+        if self._row is not None and any(self._row["cells"]):
+            self._table["rows"].append(self._row)
+        self._row = None
+
+
+# Header text -> poll field for the non-candidate columns
+HEADER_FIELDS = [
+    (re.compile(r"\bpollster\b|\bpoll\b|\bsource\b", re.I), "pollster"),
+    (re.compile(r"\bdates?\b|\bfielded\b", re.I), "date"),
+    (re.compile(r"\bsample\b|^n$", re.I), "sampleSize"),
+]
 
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
-        "Accept-Language": "en-US,en;q=0.9",
-    }
+CANDIDATE_ALIASES = {"ocasio": ["aoc"]}
+
+US_STATES = [
+    "Alabama", "Alaska", "Arizona", "Arkansas", "California", "Colorado", "Connecticut",
+    "Delaware", "Florida", "Georgia", "Hawaii", "Idaho", "Illinois", "Indiana", "Iowa",
+    "Kansas", "Kentucky", "Louisiana", "Maine", "Maryland", "Massachusetts", "Michigan",
+    "Minnesota", "Mississippi", "Missouri", "Montana", "Nebraska", "Nevada", "New Hampshire",
+    "New Jersey", "New Mexico", "New York", "North Carolina", "North Dakota", "Ohio",
+    "Oklahoma", "Oregon", "Pennsylvania", "Rhode Island", "South Carolina", "South Dakota",
+    "Tennessee", "Texas", "Utah", "Vermont", "Virginia", "Washington", "West Virginia",
+    "Wisconsin", "Wyoming",
+]
 
+MONTHS = {m: i + 1 for i, m in enumerate(
+    ["jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"])}
+
+
+def map_columns(header_cells):
+    """Column index -> poll field ("pollster", "date", "sampleSize" or a CANDIDATES id)."""
+    columns = {}
+    for i, text in enumerate(header_cells):
+        lower = text.lower()
+        for cand in CANDIDATES:
+            if re.search(rf"\b({'|'.join([cand] + CANDIDATE_ALIASES.get(cand, []))})", lower):
+                columns[i] = cand
+                break
+        else:
+            for pattern, field in HEADER_FIELDS:
+                if pattern.search(text) and field not in columns.values():
+                    columns[i] = field
+                    break
+    return columns
+
+
+def parse_date_cell(text):
+    """Last date in a cell such as "2026-03-01", "2/17 - 2/19/2026" or "Feb 28 - Mar 2, 2026"."""
+    text = text.strip()
+    m = re.search(r"(\d{4})-(\d{2})-(\d{2})\s*$", text)
+    if m:
+        y, mo, d = int(m.group(1)), int(m.group(2)), int(m.group(3))
+    elif (m := re.search(r"(\d{1,2})/(\d{1,2})/(\d{2}|\d{4})\s*$", text)):
+        mo, d, y = int(m.group(1)), int(m.group(2)), int(m.group(3))
+        y += 2000 if y < 100 else 0
+    elif (m := re.search(r"([A-Za-z]{3})[a-z]*\.?\s+(?:\d{1,2}\s*[-\u2013]\s*)?(\d{1,2}),?\s+(\d{4})\s*$", text)):
+        mo, d, y = MONTHS.get(m.group(1).lower()), int(m.group(2)), int(m.group(3))
+    elif (m := re.search(r"[-\u2013]\s*(\d{1,2}),?\s+(\d{4})\s*$", text)) and (
+            mm := re.search(r"([A-Za-z]{3})[a-z]*\.?\s+\d{1,2}\s*[-\u2013]", text)):
+        mo, d, y = MONTHS.get(mm.group(1).lower()), int(m.group(1)), int(m.group(2))
+    else:
+        return None
     try:
-        resp = requests.get(
-            "https://www.racetothewh.com/president/2028/dem",
-            headers=headers,
-            timeout=20
-        )
-        resp.raise_for_status()
-        html = resp.text
-        print(f"  [Phase 0] Got {len(html)} chars of HTML")
-    except Exception as e:
-        print(f"  [Phase 0] requests error: {e}")
-        return []
-
-    # Strip HTML tags to get readable text
-    text = re.sub(r"<[^>]+>", " ", html)
-    text = re.sub(r"\s+", " ", text).strip()
-    print(f"  [Phase 0] Stripped to {len(text)} chars of text")
-
-    client = anthropic.Anthropic(api_key=os.environ["ANTHROPIC_API_KEY"])
+        return datetime(y, mo, d).strftime("%Y-%m-%d")
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_number_cell(text):
+    m = re.search(r"-?\d[\d,]*(?:\.\d+)?", text)
+    return float(m.group(0).replace(",", "")) if m else None
+
+
+def row_to_poll(cells, columns, state, href):
+    """Poll dict in the SYSTEM_PROMPT schema, or None if the row cannot be mapped."""
+    fields = {columns[i]: cell for i, cell in enumerate(cells) if i in columns}
+    pollster = fields.get("pollster", "").strip()
+    date = parse_date_cell(fields.get("date", ""))
+    if not pollster or not date:
+        return None
+    poll = {
+        "pollster": pollster,
+        "date": date,
+        "state": state,
+        "type": state,
+        "sampleSize": None,
+        "source_url": href if href and href.startswith("http") else None,
+    }
+    sample = parse_number_cell(fields.get("sampleSize", ""))
+    poll["sampleSize"] = int(sample) if sample else None
+    for cand in CANDIDATES:
+        poll[cand] = parse_number_cell(fields[cand]) if cand in fields else None
+    poll["crosstabs"] = None
+    if all(poll[c] is None for c in CANDIDATES):
+        return None
+    return poll
+
+
+def parse_poll_tables(html):
+    """Deterministic poll table extractor (racetothewh, wikipedia).
+
+    Returns (header_text, row_text, poll) for every data row of every poll table,
+    in page order. poll is None for rows the parser could not map; those are the
+    only rows that still go to the model. Polling averages are dropped.
+    """
+    parser = PollTableParser()
+    parser.feed(html)
+    parser.close()
+
+    rows = []
+    for table in parser.tables:
+        header_cells, columns = [], {}
+        state = next((s for s in US_STATES if s.lower() in table["heading"].lower()), "National")
+        for row in table["rows"]:
+            if row["header"]:
+                header_cells, columns = row["cells"], map_columns(row["cells"])
+                continue
+            if not any(field in CANDIDATES for field in columns.values()):
+                continue  # not a poll table
+            if re.search(r"\baverage\b", " ".join(row["cells"]), re.I):
+                continue
+            header_text = f"{table['heading']} :: {' | '.join(header_cells)}"
+            rows.append((header_text, " | ".join(row["cells"]), row_to_poll(row["cells"], columns, state, row["href"])))
+    return rows
+
+
+def row_hash(header, row):
+    # The header is part of the hash so a re-ordered column set invalidates every row
+    return hashlib.sha1(f"{header}\n{row}".encode("utf-8")).hexdigest()
+
+
+def load_row_state():
     try:
-        response = client.messages.create(
-            model="claude-opus-4-6",
-            max_tokens=4000,
-            system=SYSTEM_PROMPT,
-            messages=[{"role": "user", "content": f"Extract ALL polls from this page text as a JSON array. Look for rows with a date, pollster name, and candidate percentages.\n\n{text[:8000]}"}],
+        with open(ROW_STATE_FILE) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {"fingerprint": None, "rows": []}
+
+
+def save_row_state(fingerprint, hashes):
+    ROW_STATE_FILE.parent.mkdir(parents=True, exist_ok=True)
+    with open(ROW_STATE_FILE, "w") as f:
+        json.dump({"fingerprint": fingerprint, "rows": hashes}, f)
+
+
+def page_rows(html):
+    """No-table fallback: the stripped page split into ("", line) rows at block-level tags."""
+    text = re.sub(r"(?i)<br\s*/?>|</(?:p|div|li|tr|h[1-6])>", "\n", html)
+    return [("", line) for line in (strip_tags(part) for part in text.split("\n")) if line]
+
+
+def chunk_rows(rows, size, overlap):
+    """Split (header, row) pairs into chunks of about `size` chars on row boundaries.
+
+    Consecutive chunks share `overlap` rows so a poll straddling a boundary is seen
+    whole at least once. A single row longer than `size` is cut into pieces.
+    """
+    pieces = []
+    for header, row in rows:
+        pieces.extend((header, row[i:i + size]) for i in range(0, len(row), size))
+
+    chunks, start = [], 0
+    while start < len(pieces):
+        end, used = start, 0
+        while end < len(pieces) and (end == start or used + len(pieces[end][1]) <= size):
+            used += len(pieces[end][1]) + 1
+            end += 1
+        chunks.append(pieces[start:end])
+        if end >= len(pieces):
+            break
+        start = max(start + 1, end - overlap)
+    return chunks
+
+
+def extract_chunk(client, text):
+    """Yield polls from one chunk as the model streams them; a cut-off reply keeps its complete polls."""
+    yield from iter_array_items(llm_cache.stream(
+        client,
+        "racetothewh_extract",
+        limiter=LIMITER,
+        model="claude-opus-4-6",
+        max_tokens=CHUNK_MAX_TOKENS,
+        system=SYSTEM_PROMPT,
+        messages=[{"role": "user", "content": f"Extract ALL polls from this page text as a JSON array. Look for rows with a date, pollster name, and candidate percentages.\n\n{text}"}],
+    ))
+
+
+def extract_rows_chunked(client, rows, emit):
+    """Extract polls from (header, row) pairs in concurrent, overlapping chunks.
+
+    Each poll is passed to emit() as soon as its chunk's stream completes it,
+    de-duplicated on poll_key across chunks (first to arrive wins). Returns the
+    number emitted.
+    """
+    chunks = [rows_text(chunk) for chunk in chunk_rows(rows, CHUNK_CHARS, CHUNK_OVERLAP_ROWS)]
+    print(f"  [racetothewh] Extracting {sum(len(c) for c in chunks)} chars in {len(chunks)} chunk(s)")
+    keys, lock = set(), threading.Lock()
+    emitted = 0
+
+    def run(text):
+        nonlocal emitted
+        for poll in extract_chunk(client, text):
+            if isinstance(poll, dict) and poll.get("pollster") and poll.get("date"):
+                key = poll_key(poll)
+                with lock:
+                    if key in keys:
+                        continue
+                    keys.add(key)
+            with lock:
+                emitted += 1
+            emit(poll)
+
+    with ThreadPoolExecutor(max_workers=CHUNK_WORKERS) as pool:
+        list(pool.map(METRICS.timed("racetothewh_extract", run), chunks))
+    return emitted
+
+
+def rows_text(rows):
+    """Page text for (header, row) pairs, each table's header repeated once."""
+    lines, last_header = [], None
+    for header, row in rows:
+        if header and header != last_header:
+            lines.append(header)
+            last_header = header
+        lines.append(row)
+    return "\n".join(lines)
+
+
+@sources.register
+class RaceToTheWH(sources.Source):
+    """racetothewh.com's poll tables, parsed directly; only new rows the parser cannot map go to Claude."""
+
+    name = "racetothewh"
+    url = RACETOTHEWH_URL
+    row_state = None  # (fingerprint, row hashes) saved by commit()
+
+    def run(self, emit, existing):
+        self.row_state = None
+        html = self.fetch().text
+
+        # With no recognizable poll table every line of the stripped page is an unmapped row
+        rows = parse_poll_tables(html) or [(header, row, None) for header, row in page_rows(html)]
+
+        # Fingerprint the poll table; only rows not seen last run are considered
+        hashes = [row_hash(h, r) for h, r, _ in rows]
+        fingerprint = hashlib.sha1("".join(hashes).encode("utf-8")).hexdigest()
+        state = load_row_state()
+        if fingerprint == state["fingerprint"]:
+            self.log(f"Poll table unchanged ({len(rows)} rows), skipping extraction")
+            return
+
+        seen = set(state["rows"])
+        new_rows = [row for row, h in zip(rows, hashes) if h not in seen]
+        polls = [poll for _, _, poll in new_rows if poll]
+        unmapped = [(header, row) for header, row, poll in new_rows if not poll]
+        self.log(f"{len(new_rows)} of {len(rows)} rows new or changed: "
+                 f"{len(polls)} parsed, {len(unmapped)} left for the model")
+        for poll in polls:
+            emit(poll)
+        if unmapped:
+            client = make_client()
+            extracted = extract_rows_chunked(client, unmapped, emit)
+            self.log(f"Extracted {extracted} poll(s) from unmapped rows")
+        self.row_state = (fingerprint, hashes)
+
+    def commit(self):
+        # Only now are this run's rows in the store; saved any earlier, a failed
+        # merge or write would leave them marked as seen and never ingested
+        if self.row_state:
+            save_row_state(*self.row_state)
+
+
+@sources.register
+class WikipediaPolls(sources.Source):
+    """Wikipedia's nationwide primary polling tables, read with the same table parser.
+
+    Rows the parser cannot map are dropped rather than sent to the model; the
+    page is a cross-check on the other sources, not worth extraction spend.
+    """
+
+    name = "wikipedia"
+    url = WIKIPEDIA_URL
+    interval_hours = 12
+    headers = {**sources.BROWSER_HEADERS, "User-Agent": "PollBot/1.0 (2028 primary poll tracker)"}
+
+    def parse(self, resp):
+        for _, _, poll in parse_poll_tables(resp.text):
+            if poll:
+                # Footnote markers ("Emerson College[12]") are not part of the name
+                poll["pollster"] = re.sub(r"\s*\[[^\]]*\]", "", poll["pollster"]).strip()
+                yield poll
+
+
+@sources.register
+class ClaudeWebSearch(sources.Source):
+    """Claude web search for polls the scraped sources miss.
+
+    The reply is streamed and each poll passed to emit() as soon as it is complete.
+    """
+
+    name = "web_search"
+
+    def run(self, emit, existing):
+        client = make_client()
+
+        recent = sorted(existing, key=lambda p: p["date"], reverse=True)[:20]
+        existing_summary = "\n".join(
+            f"- {p['pollster']} | {p.get('state', 'National')} | {p['date']}"
+            for p in recent
         )
-        raw = "".join(b.text for b in response.content if b.type == "text").strip()
-        polls = parse_json_response(raw)
-        print(f"  [Phase 0] Extracted {len(polls)} poll(s) from racetothewh.com")
-        return polls
-    except Exception as e:
-        print(f"  [Phase 0] Claude extraction error: {e}")
-        return []
-
-
-def fetch_polls_claude(existing):
-    """Phase 1: Claude web search for polls not already in existing list."""
-    client = anthropic.Anthropic(api_key=os.environ["ANTHROPIC_API_KEY"])
-
-    recent = sorted(existing, key=lambda p: p["date"], reverse=True)[:20]
-    existing_summary = "\n".join(
-        f"- {p['pollster']} | {p.get('state', 'National')} | {p['date']}"
-        for p in recent
-    )
 
-    msg = f"""Search for ALL 2028 Democratic presidential primary polls published in the last 30 days.
+        msg = f"""Search for ALL 2028 Democratic presidential primary polls published in the last 30 days.
 
 ALREADY IN OUR DATABASE (do not re-add these):
 {existing_summary}
@@ -149,94 +506,183 @@ Search for:
 
 Return the full JSON array of new polls not in the existing database. Start your response with ["""
 
-    try:
-        response = client.messages.create(
+        found = 0
+        for poll in iter_array_items(llm_cache.stream(
+            client,
+            "poll_web_search",
+            limiter=LIMITER,
             model="claude-opus-4-6",
             max_tokens=4000,
             system=SYSTEM_PROMPT,
             tools=[{"type": "web_search_20250305", "name": "web_search"}],
             messages=[{"role": "user", "content": msg}],
-        )
-        time.sleep(30)
-        raw = "".join(b.text for b in response.content if b.type == "text").strip()
-        polls = parse_json_response(raw)
-        print(f"  [Phase 1] Found {len(polls)} poll(s)")
-        return polls
-    except anthropic.RateLimitError as e:
-        print(f"  [Phase 1] Rate limit hit, skipping: {e}")
-        return []
-    except Exception as e:
-        print(f"  [Phase 1] Error: {e}")
-        return []
-
-
-def validate(poll):
-    if not poll.get("pollster") or not poll.get("date"):
-        return False
-    try:
-        datetime.strptime(poll["date"], "%Y-%m-%d")
-    except ValueError:
-        return False
-    if poll["date"] < START_DATE:
-        return False
-    return any(
-        poll.get(c) is not None and isinstance(poll.get(c), (int, float))
-        for c in CANDIDATES
-    )
-
-
-def merge(existing, new_polls):
-    keys = existing_keys(existing)
-    added = 0
-    for poll in new_polls:
-        if not validate(poll):
-            print(f"  Skip invalid: {poll.get('pollster')} {poll.get('date')}")
-            continue
+        )):
+            found += 1
+            emit(poll)
+        self.log(f"Found {found} poll(s)")
+
+
+def validate(polls):
+    """Boolean per poll: has a pollster, an ISO date on or after START_DATE, and a numeric topline."""
+    matrix = PollMatrix.from_polls(polls, CANDIDATES, with_crosstabs=False)
+    has_pollster = matrix.pollster_mask(bool)
+    in_range = matrix.day >= date.fromisoformat(START_DATE).toordinal()
+    has_numbers = ~np.isnan(matrix.toplines_for(CANDIDATES)).all(axis=1)
+    return has_pollster & in_range & has_numbers
+
+
+class Merger:
+    """Appends valid, non-duplicate polls to `existing` one at a time, as they arrive.
+
+    Near-duplicates are found with a DedupIndex; every poll it merges (drops)
+    or flags is appended to `report` when one is given.
+    """
+
+    def __init__(self, existing, report=None):
+        self.existing = existing
+        self.report = report
+        self.index = DedupIndex(existing, CANDIDATES)
+        self.ids = {p["id"] for p in existing if p.get("id")}
+        self.added = 0
+
+    def new_id(self, poll):
+        """auto-<date>-<state>-<pollster[:12]>; when that is taken (pollsters sharing a
+        12-character prefix), a short hash of the full pollster name and then a counter
+        are appended, so a new poll never replaces an existing one in the store."""
+        state_slug = poll["state"].lower().replace(" ", "-")
+        pollster = poll["pollster"].lower().replace(" ", "")
+        poll_id = f"auto-{poll['date']}-{state_slug}-{pollster[:12]}"
+        if poll_id not in self.ids:
+            return poll_id
+        base = f"{poll_id}-{hashlib.sha1(pollster.encode('utf-8')).hexdigest()[:6]}"
+        poll_id, n = base, 2
+        while poll_id in self.ids:
+            poll_id, n = f"{base}-{n}", n + 1
+        return poll_id
+
+    def add(self, poll, valid=None):
+        """Merge one poll; `valid` is its validate() result when already known."""
+        if valid is None:
+            valid = isinstance(poll, dict) and bool(validate([poll])[0])
+        if not valid:
+            if isinstance(poll, dict):
+                print(f"  Skip invalid: {poll.get('pollster')} {poll.get('date')}")
+            return False
         if "state" not in poll or not poll["state"]:
             poll["state"] = "National"
-        key = (poll["pollster"].lower().strip(), poll["date"], poll["state"].lower())
-        if key in keys:
-            print(f"  Duplicate: {poll['pollster']} ({poll['state']}, {poll['date']})")
-            continue
-        state_slug = poll["state"].lower().replace(" ", "-")
-        poll["id"] = f"auto-{poll['date']}-{state_slug}-{poll['pollster'].lower().replace(' ', '')[:12]}"
+        action, score, match = self.index.classify(poll)
+        if action and self.report is not None:
+            self.report.append({
+                "action": action,
+                "score": round(score, 3),
+                "poll": {k: poll.get(k) for k in ("pollster", "date", "state", "sampleSize")},
+                "existing_id": match.get("id"),
+                "existing": {k: match.get(k) for k in ("pollster", "date", "state", "sampleSize")},
+            })
+        if action == "merged":
+            print(f"  Duplicate: {poll['pollster']} ({poll['state']}, {poll['date']}) ~ {match['pollster']} {match['date']} [{score:.2f}]")
+            return False
+        if action == "flagged":
+            print(f"  ? Possible duplicate: {poll['pollster']} ({poll['state']}, {poll['date']}) ~ {match['pollster']} {match['date']} [{score:.2f}]")
+        poll["id"] = self.new_id(poll)
+        self.ids.add(poll["id"])
         if "crosstabs" not in poll:
             poll["crosstabs"] = None
-        existing.append(poll)
-        keys.add(key)
-        added += 1
+        self.existing.append(poll)
+        self.index.add(poll)
+        self.added += 1
         print(f"  ✓ Added: {poll['pollster']} ({poll['state']}, {poll['date']})")
-    return existing, added
+        return True
 
 
-def main():
-    print(f"=== Poll Fetcher {datetime.utcnow().isoformat()} UTC ===")
-    existing = load_existing()
-    print(f"Existing: {len(existing)} polls")
+def merge(existing, new_polls, report=None):
+    """Append valid, non-duplicate new polls to existing; validation runs once over the batch."""
+    merger = Merger(existing, report)
+    for poll, valid in zip(new_polls, validate(new_polls)):
+        merger.add(poll, bool(valid))
+    return existing, merger.added
 
-    all_new = []
 
-    # Phase 0: requests-based scrape of racetothewh.com
-    print("\n--- Phase 0: racetothewh.com scrape ---")
-    scraped = scrape_racetothewh()
-    all_new.extend(scraped)
+def update_polls(source_names=None):
+    store = PollStore.open()
+    existing = store.polls()
+    before = len(existing)
+    print(f"Existing: {len(existing)} polls")
 
-    # Phase 1: Claude web search for anything else
-    print("\n--- Phase 1: Claude web search ---")
-    combined = existing + all_new
-    claude_polls = fetch_polls_claude(combined)
-    all_new.extend(claude_polls)
+    # Every due source runs at once on its own thread and streams polls into a queue;
+    # each is validated and merged here the moment it arrives
+    source_state = sources.load_state()
+    due = sources.due(source_state, source_names)
+    names = [source.name for source in due]
+    skipped = [name for name in sources.SOURCES if name not in names]
+    print(f"\n--- Sources: {', '.join(names) or 'none due'} | not due: {', '.join(skipped) or 'none'} "
+          f"(merging as polls arrive) ---")
+    incoming = queue.Queue()
+    report = []
+    merger = Merger(existing, report)
+    received = 0
+    # A snapshot, since merging appends to existing while sources read it
+    snapshot = list(existing)
+    with ThreadPoolExecutor(max_workers=max(1, len(due))) as pool:
+        running = [pool.submit(sources.run_source, source, snapshot, incoming.put, source_state) for source in due]
+        for future in running:
+            future.add_done_callback(lambda _: incoming.put(SOURCE_DONE))
+        pending = len(running)
+        while pending:
+            poll = incoming.get()
+            if poll is SOURCE_DONE:
+                pending -= 1
+                continue
+            received += 1
+            with METRICS.phase("merge"):
+                if merger.add(poll) and merger.added == 1:
+                    METRICS.mark("first_poll_merged")
+        for future in running:
+            future.result()
+    added = merger.added
+    METRICS.count("candidate_polls", received)
+    METRICS.count("polls_added", added)
+    print(f"\n--- Merged {received} candidate poll(s) ---")
+    if report:
+        DEDUP_REPORT_FILE.parent.mkdir(parents=True, exist_ok=True)
+        with open(DEDUP_REPORT_FILE, "w") as f:
+            json.dump(report, f, indent=2)
+        flagged = sum(1 for r in report if r["action"] == "flagged")
+        print(f"  Near-duplicates: {len(report) - flagged} merged, {flagged} flagged (see {DEDUP_REPORT_FILE})")
+
+    # Only the new polls are written to the store's log; polls.json is re-exported from it
+    with METRICS.phase("write"):
+        store.add(existing[before:])
+        store.maybe_compact()
+        store.export()
+        shard_export.write_artifacts(existing)
+    for source in due:
+        source.commit()
+    sources.save_state(source_state)
+
+    print(f"\nDone. Added {added} new poll(s). Total: {len(existing)}")
 
-    # Merge everything
-    print(f"\n--- Merging {len(all_new)} candidate poll(s) ---")
-    merged, added = merge(existing, all_new)
-    merged.sort(key=lambda p: p["date"], reverse=True)
 
-    POLLS_FILE.parent.mkdir(parents=True, exist_ok=True)
-    with open(POLLS_FILE, "w") as f:
-        json.dump(merged, f, indent=2)
+def main():
+    parser = argparse.ArgumentParser(description="Fetch new 2028 Democratic primary polls")
+    parser.add_argument("--replay", action="store_true", help="Serve model calls only from the LLM cache (no API traffic)")
+    parser.add_argument("--metrics-file", type=Path, default=METRICS_FILE, help=f"Where to write run metrics (default: {METRICS_FILE})")
+    parser.add_argument("--profile", action="store_true", help="Dump cProfile stats of the main thread to .cache/fetch_polls.prof")
+    parser.add_argument("--source", action="append", choices=list(sources.SOURCES),
+                        help="Run only this source, due or not (repeatable; default: every due source)")
+    args = parser.parse_args()
+
+    if args.replay:
+        llm_cache.set_replay(True)
+        os.environ.setdefault("ANTHROPIC_API_KEY", "replay")
 
-    print(f"\nDone. Added {added} new poll(s). Total: {len(merged)}")
+    print(f"=== Poll Fetcher {datetime.utcnow().isoformat()} UTC ===")
+    # Metrics are written even when the run fails, so a slow or broken run still leaves evidence
+    try:
+        with profiled(args.profile, "fetch_polls"):
+            update_polls(args.source)
+    finally:
+        METRICS.write(args.metrics_file, script="fetch_polls", replay=args.replay)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,242 @@
+"""
+http_cache.py - Persistent on-disk HTTP cache with conditional GETs.
+
+Entries are keyed by URL: .cache/http/meta/<sha256(url)>.json holds the ETag,
+Last-Modified and the hash of the body. Bodies live content-addressed in
+.cache/http/blobs/<sha256(body)>, and anything derived from a body (e.g.
+extracted PDF text) is stored next to it as <sha256(body)>.<name>, so identical
+bytes are never parsed twice. Revisits send If-None-Match / If-Modified-Since
+and a 304 is served from disk (or refetched in full if the body was evicted
+meanwhile). Total size is bounded with LRU eviction.
+
+Requests go through one keep-alive requests.Session per host, so the sources
+and PDF downloads that hit the same site reuse connections, and at most
+HOST_CONCURRENCY requests are in flight to any one host however many threads
+call get() (POLL_HOST_CONCURRENCY overrides it).
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from paths import CACHE_ROOT
+from run_metrics import METRICS
+
+CACHE_DIR = CACHE_ROOT / "http"
+MAX_BYTES = int(os.environ.get("POLL_CACHE_MAX_BYTES", 500 * 1024 * 1024))
+HOST_CONCURRENCY = int(os.environ.get("POLL_HOST_CONCURRENCY", 4))
+
+META_DIR = CACHE_DIR / "meta"
+BLOB_DIR = CACHE_DIR / "blobs"
+
+_lock = threading.Lock()
+_total_bytes = None  # bytes in BLOB_DIR, see _added()
+_hosts_lock = threading.Lock()
+_total_bytes = None  # bytes in BLOB_DIR, see _added()
+_hosts = {}  # host -> (Session, BoundedSemaphore)
+
+
+class CachedResponse:
+    """The parts of requests.Response the scripts use, backed by the cache."""
+
+    def __init__(self, url, status_code, content, headers, encoding=None, body_hash=None, from_cache=False):
+        self.url = url
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers
+        self.encoding = encoding
+        self.body_hash = body_hash
+        self.from_cache = from_cache
+
+    @property
+    def text(self):
+        return self.content.decode(self.encoding or "utf-8", errors="replace")
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code} Error for url: {self.url}")
+
+
+def _host(url):
+    """Keep-alive session and concurrency slots for the host of `url`, created on first use."""
+    host = urlsplit(url).netloc.lower()
+    with _hosts_lock:
+        if host not in _hosts:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=HOST_CONCURRENCY)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _hosts[host] = (session, threading.BoundedSemaphore(HOST_CONCURRENCY))
+        return _hosts[host]
+
+
+def _url_key(url):
+    return hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+
+def _write_atomic(path, data):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def _read_meta(url):
+    path = META_DIR / f"{_url_key(url)}.json"
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_meta(meta):
+    meta["last_used"] = time.time()
+    _write_atomic(META_DIR / f"{_url_key(meta['url'])}.json", json.dumps(meta).encode("utf-8"))
+
+
+def _request(url, headers, timeout, conditional=False):
+    """One GET through the host's session and concurrency slots, recorded in METRICS."""
+    session, slots = _host(url)
+    with slots:
+        start = time.perf_counter()
+        try:
+            resp = session.get(url, headers=headers, timeout=timeout)
+        except requests.RequestException:
+            METRICS.record_http(url, 0, 0, time.perf_counter() - start)
+            raise
+        elapsed = time.perf_counter() - start
+    METRICS.record_http(url, resp.status_code, len(resp.content), elapsed,
+                        from_cache=conditional and resp.status_code == 304)
+    return resp
+
+
+def get(url, headers=None, timeout=20):
+    """GET `url`, revalidating against the cached copy. Non-200 responses are not cached."""
+    headers = dict(headers or {})
+    meta = _read_meta(url)
+    if meta and (BLOB_DIR / meta["body_hash"]).exists():
+        conditional = dict(headers)
+        if meta.get("etag"):
+            conditional["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            conditional["If-Modified-Since"] = meta["last_modified"]
+        resp = _request(url, conditional, timeout, conditional=True)
+        if resp.status_code == 304:
+            try:
+                content = (BLOB_DIR / meta["body_hash"]).read_bytes()
+            except FileNotFoundError:
+                # Evicted since the check above; a plain GET fetches the body again
+                resp = _request(url, headers, timeout)
+            else:
+                with _lock:
+                    _write_meta(meta)
+                return CachedResponse(url, 200, content, dict(resp.headers),
+                                      encoding=meta.get("encoding"), body_hash=meta["body_hash"], from_cache=True)
+    else:
+        resp = _request(url, headers, timeout)
+
+    if resp.status_code != 200:
+        return CachedResponse(url, resp.status_code, resp.content, dict(resp.headers), encoding=resp.encoding)
+
+    body_hash = hashlib.sha256(resp.content).hexdigest()
+    with _lock:
+        blob = BLOB_DIR / body_hash
+        if not blob.exists():
+            _write_atomic(blob, resp.content)
+            _added(len(resp.content))
+        _write_meta({
+            "url": url,
+            "body_hash": body_hash,
+            "etag": resp.headers.get("ETag"),
+            "last_modified": resp.headers.get("Last-Modified"),
+            "encoding": resp.encoding,
+        })
+    return CachedResponse(url, 200, resp.content, dict(resp.headers), encoding=resp.encoding, body_hash=body_hash)
+
+
+def load_derived(body_hash, name):
+    """Return text previously derived from a cached body (e.g. name="pdf.txt"), or None."""
+    if not body_hash:
+        return None
+    try:
+        return (BLOB_DIR / f"{body_hash}.{name}").read_text(encoding="utf-8")
+    except OSError:
+        return None
+
+
+def save_derived(body_hash, name, text):
+    if body_hash:
+        data = text.encode("utf-8")
+        with _lock:
+            _write_atomic(BLOB_DIR / f"{body_hash}.{name}", data)
+            _added(len(data))
+
+
+def _blob_sizes():
+    """{body hash: bytes of the blob and everything derived from it}. Caller holds _lock."""
+    sizes = {}
+    for blob in BLOB_DIR.iterdir():
+        # Another process may be mid-write or mid-eviction
+        if blob.name.endswith(".tmp"):
+            continue
+        try:
+            size = blob.stat().st_size
+        except FileNotFoundError:
+            continue
+        body_hash = blob.name.split(".")[0]
+        sizes[body_hash] = sizes.get(body_hash, 0) + size
+    return sizes
+
+
+def _added(size):
+    """Count `size` new bytes in BLOB_DIR and evict once over MAX_BYTES. Caller holds _lock.
+
+    The total is scanned from disk once per process, then kept running, so a
+    download only walks the cache when it actually has to evict.
+    """
+    global _total_bytes
+    if _total_bytes is None:
+        _total_bytes = sum(_blob_sizes().values())
+    else:
+        _total_bytes += size
+    if _total_bytes > MAX_BYTES:
+        _evict()
+
+
+def _evict():
+    """Drop least-recently-used URL entries until the cache fits in MAX_BYTES. Caller holds _lock."""
+    global _total_bytes
+    sizes = _blob_sizes()
+    _total_bytes = sum(sizes.values())
+    if _total_bytes <= MAX_BYTES:
+        return
+
+    metas = []
+    for path in META_DIR.glob("*.json"):
+        try:
+            with open(path) as f:
+                metas.append((json.load(f), path))
+        except (OSError, ValueError):
+            path.unlink(missing_ok=True)
+    metas.sort(key=lambda m: m[0].get("last_used", 0))
+    referenced = {}
+    for meta, _ in metas:
+        referenced[meta["body_hash"]] = referenced.get(meta["body_hash"], 0) + 1
+
+    for meta, path in metas:
+        if _total_bytes <= MAX_BYTES:
+            break
+        path.unlink(missing_ok=True)
+        body_hash = meta["body_hash"]
+        referenced[body_hash] -= 1
+        if referenced[body_hash] == 0:
+            for blob in BLOB_DIR.glob(f"{body_hash}*"):
+                blob.unlink(missing_ok=True)
+            _total_bytes -= sizes.get(body_hash, 0)
@@ -0,0 +1,83 @@
+"""
+json_stream.py - Incremental parser for a JSON array arriving in pieces.
+
+Model replies are streamed, and a reply that hits max_tokens stops mid-array,
+where json.loads would reject the whole thing. ArrayItems is fed text chunks
+as they arrive and returns each top-level object or array element of the
+first JSON array the moment its closing bracket is seen, so a cut-off reply
+still yields every element that was complete. Text before the opening "["
+(prose, a ```json fence) is skipped; scalar elements are ignored.
+
+    parser = ArrayItems()
+    for chunk in chunks:
+        for poll in parser.feed(chunk):
+            ...
+"""
+import json
+
+OPENERS = "{["
+CLOSERS = "}]"
+
+
+class ArrayItems:
+    """Scanner state carried between feed() calls."""
+
+    def __init__(self):
+        self.started = False   # seen the array's "["
+        self.done = False      # seen its matching "]"
+        self.depth = 0         # 1 inside the array, 2+ inside an element
+        self.in_string = False
+        self.escape = False
+        self.element = []      # chunks of the element being read
+        self.errors = 0        # complete elements that were not valid JSON
+
+    def feed(self, text):
+        """Scan another chunk; return the elements it completed, in order."""
+        items = []
+        start = 0 if self.depth >= 2 else None
+        for i, ch in enumerate(text):
+            if self.done:
+                break
+            if not self.started:
+                if ch == "[":
+                    self.started, self.depth = True, 1
+                continue
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif ch == "\\":
+                    self.escape = True
+                elif ch == '"':
+                    self.in_string = False
+                continue
+            if ch == '"':
+                self.in_string = True
+                continue
+            if ch in OPENERS:
+                if self.depth == 1:
+                    start = i
+                self.depth += 1
+            elif ch in CLOSERS:
+                self.depth -= 1
+                if self.depth == 1:
+                    self.element.append(text[start:i + 1])
+                    self._emit("".join(self.element), items)
+                    self.element, start = [], None
+                elif self.depth == 0:
+                    self.done = True
+        if start is not None and self.depth >= 2:
+            self.element.append(text[start:])
+        return items
+
+    def _emit(self, raw, items):
+        try:
+            items.append(json.loads(raw))
+        except ValueError:
+            self.errors += 1
+
+
+def iter_array_items(chunks):
+    """Yield each complete element of the JSON array spread across `chunks`."""
+    parser = ArrayItems()
+    for chunk in chunks:
+        yield from parser.feed(chunk)
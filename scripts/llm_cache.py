@@ -0,0 +1,135 @@
+"""
+llm_cache.py - Memoizing wrapper around client.messages.create with record/replay.
+
+Responses are stored under .cache/llm/<key>.json, where key is a hash of the
+model, system prompt, messages, tools and sampling parameters (max_tokens,
+temperature, ...), so raising max_tokens asks again. Each call site has its
+own TTL: web-search answers go stale quickly, PDF parsing of fixed text never
+does. A reply cut off at max_tokens is never stored, since under a TTL of
+None it would be served forever.
+In replay mode (--replay / LLM_REPLAY=1) nothing is sent to the API: calls are
+served from cache regardless of age, and a miss raises CacheMiss. stream() is
+the streaming counterpart of create() over the same entries.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+
+import anthropic
+
+from paths import CACHE_ROOT
+from run_metrics import METRICS
+
+CACHE_DIR = CACHE_ROOT / "llm"
+
+HOUR = 3600
+DAY = 24 * HOUR
+
+# Seconds a cached response stays fresh, per call site. None = forever.
+CALL_SITE_TTLS = {
+    "racetothewh_extract": None,   # keyed on the page text itself
+    "poll_web_search": 6 * HOUR,   # fetch_polls web_search source
+    "pdf_parse": None,             # keyed on the PDF text itself
+    "poll_search": DAY,            # backfill strategy 3
+    "pdf_url_search": DAY,         # backfill strategy 2
+}
+DEFAULT_TTL = DAY
+
+REPLAY = os.environ.get("LLM_REPLAY") == "1"
+
+
+class CacheMiss(Exception):
+    """Raised in replay mode when a request has no recorded response."""
+
+
+def set_replay(enabled):
+    global REPLAY
+    REPLAY = enabled
+
+
+# Request fields that change the reply; anything else (metadata, timeouts) does not
+KEY_FIELDS = ("model", "system", "messages", "tools", "tool_choice", "max_tokens",
+              "temperature", "top_p", "top_k", "stop_sequences", "thinking")
+
+
+def request_key(kwargs):
+    payload = {k: kwargs.get(k) for k in KEY_FIELDS if kwargs.get(k) is not None}
+    blob = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+def _load(key):
+    try:
+        with open(CACHE_DIR / f"{key}.json") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _store(key, call_site, response):
+    if getattr(response, "stop_reason", None) == "max_tokens":
+        return  # truncated; the next call (perhaps with a larger max_tokens) should ask again
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    entry = {
+        "created": time.time(),
+        "call_site": call_site,
+        "response": response.model_dump(mode="json"),
+    }
+    path = CACHE_DIR / f"{key}.json"
+    tmp = path.with_name(f"{key}.{os.getpid()}.{threading.get_ident()}.tmp")
+    with open(tmp, "w") as f:
+        json.dump(entry, f)
+    os.replace(tmp, path)
+
+
+def _cached(key, call_site):
+    """The fresh cached Message for key, or None; raises CacheMiss in replay mode."""
+    entry = _load(key)
+    ttl = CALL_SITE_TTLS.get(call_site, DEFAULT_TTL)
+    if entry and (REPLAY or ttl is None or time.time() - entry["created"] < ttl):
+        response = anthropic.types.Message.model_validate(entry["response"])
+        METRICS.record_message(call_site, response, cached=True)
+        return response
+    if REPLAY:
+        raise CacheMiss(f"no recorded response for {call_site} ({key[:12]})")
+    return None
+
+
+def create(client, call_site, limiter=None, **kwargs):
+    """messages.create through the cache. `limiter` (a RateLimiter) wraps real API calls."""
+    key = request_key(kwargs)
+    cached = _cached(key, call_site)
+    if cached is not None:
+        return cached
+
+    start = time.perf_counter()
+    if limiter is not None:
+        response = limiter.call(client.messages.with_raw_response.create, **kwargs)
+    else:
+        response = client.messages.create(**kwargs)
+    METRICS.record_message(call_site, response, seconds=time.perf_counter() - start)
+    _store(key, call_site, response)
+    return response
+
+
+def stream(client, call_site, limiter=None, **kwargs):
+    """Like create(), but yields the reply's text as it arrives.
+
+    Shares create()'s cache entries. A cached reply is yielded as one chunk; a
+    live one is stored once the stream has been read to the end.
+    """
+    key = request_key(kwargs)
+    cached = _cached(key, call_site)
+    if cached is not None:
+        yield "".join(b.text for b in cached.content if b.type == "text")
+        return
+
+    start = time.perf_counter()
+    opened = limiter.stream(client, **kwargs) if limiter is not None else client.messages.stream(**kwargs)
+    with opened as live:
+        yield from live.text_stream
+        response = live.get_final_message()
+    METRICS.record_message(call_site, response, seconds=time.perf_counter() - start)
+    _store(key, call_site, response)
@@ -0,0 +1,192 @@
+"""
+load_harness.py - Offline end-to-end load test of fetch_polls.py and backfill_polls.py.
+
+Starts fake_anthropic.py in-process (injected latency, 429s and truncated
+replies; fixture racetothewh page and toplines PDFs), copies scripts/ into a
+temp tree seeded with --polls synthetic polls, and runs fetch_polls.py and
+then backfill_polls.py there against the fake server, so the real data/,
+public/ and .cache/ are never touched and every cache starts cold. Some of the
+synthetic polls point straight at a PDF on the fake server (backfill strategy
+1); the rest go through the PDF URL search (strategy 2) and web search
+(strategy 3).
+
+Each run's run_metrics.json gives the client view: model call latency p50/p99
+(rate-limiter waits and retries included), HTTP latency, throughput in model
+calls per second and 429s seen. The fake server adds what it served.
+
+    python scripts/load_harness.py --polls 5000 --workers 32 --limit 400 \\
+        --latency 0.3 --jitter 0.2 --rate-limit-rate 0.05 --truncate-rate 0.02
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+import fake_anthropic
+from paths import CACHE_ROOT
+import poll_format
+import synth_polls
+
+SCRIPTS_DIR = Path(__file__).parent
+RESULTS_FILE = CACHE_ROOT / "load_harness.json"
+
+DEFAULT_POLLS = 2000
+DEFAULT_WORKERS = 16
+DEFAULT_LIMIT = 200
+DIRECT_PDF_SHARE = 0.5
+RUN_TIMEOUT = 1800
+LOG_TAIL = 20
+
+
+def make_tree(base_url, polls, seed, direct_pdf_share):
+    """Temp copy of scripts/ with public/polls.json holding `polls` synthetic polls."""
+    root = Path(tempfile.mkdtemp(prefix="poll-load-"))
+    shutil.copytree(SCRIPTS_DIR, root / "scripts", ignore=shutil.ignore_patterns("__pycache__"))
+    rng = random.Random(seed)
+    generated = synth_polls.generate(polls, seed=seed)
+    for poll in generated:
+        if rng.random() < direct_pdf_share:
+            poll["source_url"] = f"{base_url}/pdf/{poll['id']}.pdf"
+    generated.sort(key=lambda p: p["date"], reverse=True)
+    (root / "public").mkdir()
+    (root / "public" / "polls.json").write_text(poll_format.dumps(generated))
+    return root
+
+
+def run_script(root, base_url, name, args, verbose, timeout, host_concurrency):
+    """Run scripts/<name>.py in the temp tree; return its metrics report plus exit code and wall time."""
+    metrics_file = root / ".cache" / f"{name}_metrics.json"
+    env = dict(os.environ,
+               ANTHROPIC_BASE_URL=base_url,
+               ANTHROPIC_API_KEY="fake",
+               RACETOTHEWH_URL=f"{base_url}/president/2028/dem",
+               WIKIPEDIA_POLLS_URL=f"{base_url}/wiki/2028_primary_polling",
+               POLL_HOST_CONCURRENCY=str(host_concurrency),
+               POLL_CACHE_DIR=str(root / ".cache"),
+               NO_PROXY="127.0.0.1,localhost",
+               PYTHONUNBUFFERED="1")
+    env.pop("LLM_REPLAY", None)
+    command = [sys.executable, str(root / "scripts" / f"{name}.py"), "--metrics-file", str(metrics_file), *args]
+    log_path = root / f"{name}.log"
+    start = time.perf_counter()
+    with open(log_path, "w") as log:
+        proc = subprocess.run(command, cwd=root, env=env, timeout=timeout,
+                              stdout=None if verbose else log, stderr=subprocess.STDOUT if not verbose else None)
+    wall = time.perf_counter() - start
+    if proc.returncode != 0 and not verbose:
+        print(f"  {name} exited {proc.returncode}; last lines of {log_path}:")
+        for line in log_path.read_text().splitlines()[-LOG_TAIL:]:
+            print(f"    {line}")
+    try:
+        metrics = json.loads(metrics_file.read_text())
+    except (OSError, ValueError):
+        metrics = {}
+    return {"script": name, "exit_code": proc.returncode, "wall_seconds": round(wall, 3), "metrics": metrics}
+
+
+def summarize(run):
+    """One line of headline numbers from a run_script result."""
+    metrics = run["metrics"]
+    llm = metrics.get("llm", {})
+    http = metrics.get("http", {})
+    calls = llm.get("requests", 0)
+    return {
+        "script": run["script"],
+        "exit_code": run["exit_code"],
+        "wall_seconds": run["wall_seconds"],
+        "model_calls": calls,
+        "calls_per_second": round(calls / run["wall_seconds"], 3) if run["wall_seconds"] else None,
+        "llm_p50": llm.get("latency_p50"),
+        "llm_p99": llm.get("latency_p99"),
+        "http_requests": http.get("requests", 0),
+        "http_p50": http.get("latency_p50"),
+        "http_p99": http.get("latency_p99"),
+        "rate_limited": metrics.get("counters", {}).get("rate_limited", 0),
+        "strategies": {name: f"{s['successes']}/{s['attempts']}" for name, s in metrics.get("strategies", {}).items()},
+    }
+
+
+def print_summary(rows, server):
+    print(f"\n{'script':<16} {'exit':>4} {'wall s':>8} {'calls':>6} {'calls/s':>8} {'llm p50':>8} {'llm p99':>8} "
+          f"{'http':>5} {'http p50':>8} {'http p99':>8} {'429s':>5}")
+    fmt = lambda v: "-" if v is None else f"{v:.3f}"
+    for r in rows:
+        print(f"{r['script']:<16} {r['exit_code']:>4} {r['wall_seconds']:>8.2f} {r['model_calls']:>6} "
+              f"{fmt(r['calls_per_second']):>8} {fmt(r['llm_p50']):>8} {fmt(r['llm_p99']):>8} {r['http_requests']:>5} "
+              f"{fmt(r['http_p50']):>8} {fmt(r['http_p99']):>8} {r['rate_limited']:>5}")
+        if r["strategies"]:
+            print(f"{'':<16} strategies: " + ", ".join(f"{k} {v}" for k, v in r["strategies"].items()))
+    print("\nfake server: " + ", ".join(f"{k}={v}" for k, v in server.items()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run fetch_polls and backfill_polls against a local fake API")
+    parser.add_argument("--polls", type=int, default=DEFAULT_POLLS, help=f"Synthetic polls in the store (default: {DEFAULT_POLLS})")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help=f"backfill_polls --workers (default: {DEFAULT_WORKERS})")
+    parser.add_argument("--limit", type=int, default=DEFAULT_LIMIT, help=f"backfill_polls --limit (default: {DEFAULT_LIMIT})")
+    parser.add_argument("--min-missing", type=int, default=1, help="backfill_polls --min-missing (default: 1)")
+    parser.add_argument("--client-rpm", type=int, default=6000, help="backfill_polls --rpm (default: 6000)")
+    parser.add_argument("--client-tpm", type=int, default=10_000_000, help="backfill_polls --tpm (default: 10000000)")
+    parser.add_argument("--direct-pdf-share", type=float, default=DIRECT_PDF_SHARE,
+                        help=f"Fraction of polls whose source_url is a PDF on the fake server (default: {DIRECT_PDF_SHARE})")
+    parser.add_argument("--skip-fetch", action="store_true", help="Only run backfill_polls")
+    parser.add_argument("--skip-backfill", action="store_true", help="Only run fetch_polls")
+    parser.add_argument("--timeout", type=float, default=RUN_TIMEOUT, help=f"Seconds before a run is killed (default: {RUN_TIMEOUT})")
+    parser.add_argument("--output", type=Path, default=RESULTS_FILE, help=f"Results JSON (default: {RESULTS_FILE})")
+    parser.add_argument("--keep", action="store_true", help="Keep the temp tree (logs, metrics, written files)")
+    parser.add_argument("--verbose", action="store_true", help="Stream the scripts' output instead of logging it")
+    fake_anthropic.add_fault_arguments(parser)
+    parser.set_defaults(fill=True, polls_per_reply=5)  # so every strategy and merge has work to do
+    args = parser.parse_args()
+
+    args.batch_seconds = 1.0
+    server, base_url = fake_anthropic.serve(fake=fake_anthropic.fake_from_args(args))
+    print(f"=== Load harness {datetime.utcnow().isoformat()} UTC | fake API {base_url} ===")
+    print(f"Polls: {args.polls} | Backfill workers: {args.workers} | Limit: {args.limit} | Latency: {args.latency}s "
+          f"± {args.jitter} | 429 rate: {args.rate_limit_rate} | Truncate rate: {args.truncate_rate} | RPM: {args.rpm}")
+
+    root = make_tree(base_url, args.polls, args.seed, args.direct_pdf_share)
+    runs = []
+    try:
+        if not args.skip_fetch:
+            print("\n--- fetch_polls ---")
+            runs.append(run_script(root, base_url, "fetch_polls", [], args.verbose, args.timeout, args.workers))
+        if not args.skip_backfill:
+            print("\n--- backfill_polls ---")
+            runs.append(run_script(root, base_url, "backfill_polls", [
+                "--workers", str(args.workers), "--limit", str(args.limit), "--min-missing", str(args.min_missing),
+                "--rpm", str(args.client_rpm), "--tpm", str(args.client_tpm),
+            ], args.verbose, args.timeout, args.workers))
+    finally:
+        server.shutdown()
+        if args.keep:
+            print(f"\nKept {root}")
+        else:
+            shutil.rmtree(root, ignore_errors=True)
+
+    rows = [summarize(run) for run in runs]
+    server_summary = server.fake.summary()
+    print_summary(rows, server_summary)
+    report = {
+        "generated": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+        "options": {k: v for k, v in vars(args).items() if k not in ("output",)},
+        "summary": rows,
+        "server": server_summary,
+        "runs": runs,
+    }
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps(report, indent=2, default=str))
+    print(f"\nWrote {args.output}")
+    if any(run["exit_code"] != 0 for run in runs):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
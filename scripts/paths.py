@@ -0,0 +1,12 @@
+"""
+paths.py - Where the scripts keep their local, unpublished state.
+
+The HTTP and LLM caches, run metrics, source state, the backfill ledger and
+batch checkpoint, benchmark results and the like all live under CACHE_ROOT:
+.cache/ at the repo root, unless POLL_CACHE_DIR points elsewhere (the load
+harness gives each run its own).
+"""
+import os
+from pathlib import Path
+
+CACHE_ROOT = Path(os.environ.get("POLL_CACHE_DIR", Path(__file__).parent.parent / ".cache"))
@@ -0,0 +1,123 @@
+"""
+poll_format.py - Versioned on-disk format for poll lists.
+
+Format 1 is a bare JSON list of polls whose crosstabs repeat the category
+and group names for every candidate:
+
+    "crosstabs": {"harris": {"gender": {"Men": 20, "Women": 25}, "age": {...}}}
+
+Format 2 names every (category, group) slot once in a header and stores each
+candidate's crosstabs as a positional array over those slots (null for a
+missing group, trailing nulls dropped):
+
+    {"format": 2,
+     "crosstab_groups": [["gender", ["Men", "Women"]], ["age", [...]], ...],
+     "polls": [{..., "crosstabs": {"harris": [20, 25, ...]}}, ...]}
+
+A candidate whose crosstabs would not decode back to exactly the same nested
+dict (explicit nulls, unusual key order) is stored nested as in format 1, so
+decode(encode(polls)) == polls always. Files are written one poll per line.
+load() reads either format; older files are upgraded the next time they are
+written. The frontend's decodePolls in src/App.jsx mirrors decode().
+"""
+import json
+
+FORMAT_VERSION = 2
+
+
+def crosstab_groups(polls):
+    """[[category, [group, ...]], ...] in first-seen order across all polls."""
+    groups = {}
+    for poll in polls:
+        crosstabs = poll.get("crosstabs")
+        if not isinstance(crosstabs, dict):
+            continue
+        for nested in crosstabs.values():
+            if not isinstance(nested, dict):
+                continue
+            for category, by_group in nested.items():
+                if isinstance(by_group, dict):
+                    seen = groups.setdefault(category, [])
+                    seen.extend(g for g in by_group if g not in seen)
+    return [[category, groups[category]] for category in groups]
+
+
+def _slots(header):
+    return [(category, group) for category, groups in header for group in groups]
+
+
+def _slot_index(header):
+    return {slot: i for i, slot in enumerate(_slots(header))}
+
+
+def _decode_candidate(values, slots):
+    nested = {}
+    for (category, group), value in zip(slots, values):
+        if value is not None:
+            nested.setdefault(category, {})[group] = value
+    return nested
+
+
+def _encode_candidate(nested, slot_index):
+    """Positional array for one candidate, or nested unchanged if an array would not
+    decode back to it exactly (explicit nulls, empty categories, out-of-order keys)."""
+    if not isinstance(nested, dict):
+        return nested
+    values = []
+    for category, by_group in nested.items():
+        if not isinstance(by_group, dict) or not by_group:
+            return nested
+        for group, value in by_group.items():
+            slot = slot_index[(category, group)]
+            if value is None or slot < len(values):
+                return nested
+            values.extend([None] * (slot - len(values)))
+            values.append(value)
+    return values
+
+
+def encode(polls):
+    header = crosstab_groups(polls)
+    slot_index = _slot_index(header)
+    encoded = []
+    for poll in polls:
+        crosstabs = poll.get("crosstabs")
+        if isinstance(crosstabs, dict):
+            poll = {**poll, "crosstabs": {cand: _encode_candidate(nested, slot_index) for cand, nested in crosstabs.items()}}
+        encoded.append(poll)
+    return {"format": FORMAT_VERSION, "crosstab_groups": header, "polls": encoded}
+
+
+def decode(data):
+    """Poll list from a format 1 list or a format 2 document."""
+    if isinstance(data, list):
+        return data
+    version = data.get("format")
+    if version != FORMAT_VERSION:
+        raise ValueError(f"Unsupported poll file format: {version}")
+    slots = _slots(data["crosstab_groups"])
+    polls = []
+    for poll in data["polls"]:
+        crosstabs = poll.get("crosstabs")
+        if isinstance(crosstabs, dict):
+            poll = {**poll, "crosstabs": {cand: _decode_candidate(values, slots) if isinstance(values, list) else values
+                                          for cand, values in crosstabs.items()}}
+        polls.append(poll)
+    return polls
+
+
+def dumps(polls, **extra):
+    """Format 2 text, one poll per line so diffs stay readable. `extra` adds top-level keys."""
+    doc = {**extra, **encode(polls)}
+    head = {k: v for k, v in doc.items() if k != "polls"}
+    lines = [json.dumps(p, separators=(",", ":")) for p in doc["polls"]]
+    return json.dumps(head, separators=(",", ":"))[:-1] + ',"polls":[\n' + ",\n".join(lines) + "\n]}\n"
+
+
+def loads(text):
+    return decode(json.loads(text))
+
+
+def load(path):
+    with open(path) as f:
+        return loads(f.read())
@@ -0,0 +1,300 @@
+"""
+poll_matrix.py - Columnar in-memory form of the poll list.
+
+A list of poll dicts spends most of its memory and scan time on dict
+overhead: every poll repeats 20-30 candidate keys (mostly null) and a nested
+crosstabs dict per candidate. PollMatrix holds the same data as arrays:
+
+    day          int32   (polls,)                  date.toordinal(), 0 if missing/invalid
+    pollster     int32   (polls,)                  code into .pollsters
+    state        int32   (polls,)                  code into .states
+    sample       float32 (polls,)                  NaN if missing
+    toplines     float32 (polls, candidates)       NaN if missing
+    crosstabs    float32 (polls, candidates, groups), groups are (category, group)
+
+so validation, backfill selection and aggregation are array operations.
+
+to_polls() reproduces the JSON schema exactly: per-poll key order is kept as
+an interned layout, int-vs-float as boolean masks, and fields without a
+column (source_url, type) or values the arrays cannot represent exactly (a
+non-numeric number field, a float32-lossy value, an irregular crosstabs
+dict) are kept verbatim in the poll's `extras`, which win on the way out.
+"""
+import math
+from datetime import date
+from functools import lru_cache
+
+import numpy as np
+
+META_FIELDS = ("id", "pollster", "date", "state", "type", "sampleSize", "source_url", "crosstabs")
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+@lru_cache(maxsize=65536, typed=True)
+def _exact_float32(value):
+    """True if value survives float32 storage and shortest-repr conversion back."""
+    if isinstance(value, int):
+        return -2 ** 24 <= value <= 2 ** 24
+    return float(str(np.float32(value))) == value
+
+
+@lru_cache(maxsize=65536)
+def _shortest_float(value):
+    return float(str(np.float32(value)))
+
+
+def _json_number(value, is_int):
+    return int(value) if is_int else _shortest_float(float(value))
+
+
+class Interner:
+    """Value <-> small int code, codes assigned in first-seen order."""
+
+    def __init__(self):
+        self.values = []
+        self.codes = {}
+
+    def code(self, value):
+        if value not in self.codes:
+            self.codes[value] = len(self.values)
+            self.values.append(value)
+        return self.codes[value]
+
+
+class PollMatrix:
+    def __init__(self, n, candidates, groups):
+        self.candidates = list(candidates)
+        self._cand_index = {c: i for i, c in enumerate(self.candidates)}
+        self.groups = list(groups)
+        self.day = np.zeros(n, dtype=np.int32)
+        self.pollster = np.zeros(n, dtype=np.int32)
+        self.state = np.zeros(n, dtype=np.int32)
+        self.sample = np.full(n, np.nan, dtype=np.float32)
+        self.sample_int = np.zeros(n, dtype=bool)
+        self.toplines = np.full((n, len(self.candidates)), np.nan, dtype=np.float32)
+        self.toplines_int = np.zeros((n, len(self.candidates)), dtype=bool)
+        self.crosstabs = np.full((n, len(self.candidates), len(self.groups)), np.nan, dtype=np.float32)
+        self.crosstabs_int = np.zeros((n, len(self.candidates), len(self.groups)), dtype=bool)
+        self.has_crosstabs = np.zeros((n, len(self.candidates)), dtype=bool)
+        self.crosstab_order = np.zeros(n, dtype=np.int32)
+        self.crosstab_orders = []
+        self.ids = [None] * n
+        self.pollsters = []
+        self.states = []
+        self.layouts = []
+        self.layout = np.zeros(n, dtype=np.int32)
+        self.extras = [None] * n
+
+    def __len__(self):
+        return len(self.day)
+
+    @classmethod
+    def from_polls(cls, polls, candidates=(), groups=(), with_crosstabs=True):
+        """Build from poll dicts. `candidates`/`groups` fix the first columns' order.
+
+        with_crosstabs=False skips the tensor (crosstabs then round-trip through
+        extras), for callers that only need toplines and metadata.
+        """
+        candidates = list(candidates)
+        groups = {g: None for g in groups}
+        found, not_numeric, seen_categories = {}, set(), set()
+        for poll in polls:
+            for key, value in poll.items():
+                if key in META_FIELDS:
+                    continue
+                if value is None or _is_number(value):
+                    found.setdefault(key, None)
+                else:
+                    not_numeric.add(key)
+            crosstabs = poll.get("crosstabs")
+            if not with_crosstabs or not isinstance(crosstabs, dict):
+                continue
+            for by_category in crosstabs.values():
+                for category, by_group in by_category.items() if isinstance(by_category, dict) else ():
+                    if not isinstance(by_group, dict):
+                        continue
+                    # The same group labels repeat for every candidate; look at each layout once
+                    layout = (category, tuple(by_group))
+                    if layout not in seen_categories:
+                        seen_categories.add(layout)
+                        groups.update({(category, group): None for group in by_group if (category, group) not in groups})
+        groups = list(groups)
+        candidates += [key for key in found if key not in candidates and key not in not_numeric]
+
+        matrix = cls(len(polls), candidates, groups)
+        cand_index = {c: i for i, c in enumerate(candidates)}
+        group_index = {g: i for i, g in enumerate(groups)}
+        pollsters, states, layouts, orders = Interner(), Interner(), Interner(), Interner()
+        for i, poll in enumerate(polls):
+            extras = {}
+            for key, value in poll.items():
+                if key == "id":
+                    matrix.ids[i] = value
+                elif key == "pollster" and isinstance(value, str):
+                    matrix.pollster[i] = pollsters.code(value)
+                elif key == "state" and isinstance(value, str):
+                    matrix.state[i] = states.code(value)
+                elif key == "date" and isinstance(value, str) and matrix._set_day(i, value):
+                    pass
+                elif key == "sampleSize" and (value is None or (_is_number(value) and _exact_float32(value))):
+                    if value is not None:
+                        matrix.sample[i] = value
+                        matrix.sample_int[i] = isinstance(value, int)
+                elif key == "crosstabs" and with_crosstabs and matrix._set_crosstabs(i, value, cand_index, group_index, orders):
+                    pass
+                elif key in cand_index and (value is None or (_is_number(value) and _exact_float32(value))):
+                    if value is not None:
+                        matrix.toplines[i, cand_index[key]] = value
+                        matrix.toplines_int[i, cand_index[key]] = isinstance(value, int)
+                else:
+                    extras[key] = value
+            if "pollster" not in poll or "pollster" in extras:
+                matrix.pollster[i] = pollsters.code(None)
+            if "state" not in poll or "state" in extras:
+                matrix.state[i] = states.code(None)
+            matrix.layout[i] = layouts.code(tuple(poll))
+            matrix.extras[i] = extras or None
+        matrix.pollsters = pollsters.values
+        matrix.states = states.values
+        matrix.layouts = layouts.values
+        matrix.crosstab_orders = orders.values
+        return matrix
+
+    def _set_day(self, i, value):
+        try:
+            parsed = date.fromisoformat(value)
+        except ValueError:
+            return False
+        if parsed.isoformat() != value:
+            return False
+        self.day[i] = parsed.toordinal()
+        return True
+
+    def _set_crosstabs(self, i, value, cand_index, group_index, orders):
+        """Fill row i of the tensor; False if value must also be kept verbatim in extras."""
+        if value is None:
+            return True
+        if not isinstance(value, dict):
+            return False
+        # The dense form reproduces value exactly when every entry is a representable
+        # number, no category is empty and slots appear in ascending axis order.
+        exact = bool(value)
+        self.crosstab_order[i] = orders.code(tuple(value))
+        for cand, by_category in value.items():
+            if cand not in cand_index or not isinstance(by_category, dict):
+                exact = False
+                continue
+            row = [math.nan] * len(self.groups)
+            ints = [False] * len(self.groups)
+            last = -1
+            for category, by_group in by_category.items():
+                if not isinstance(by_group, dict) or not by_group:
+                    exact = False
+                    continue
+                for group, v in by_group.items():
+                    g = group_index[(category, group)]
+                    exact = exact and g > last
+                    last = g
+                    kind = type(v)
+                    if kind is int and -2 ** 24 <= v <= 2 ** 24:
+                        row[g] = v
+                        ints[g] = True
+                    elif kind is float and _exact_float32(v):
+                        row[g] = v
+                    elif _is_number(v) and _exact_float32(v):
+                        row[g] = v
+                        ints[g] = isinstance(v, int)
+                    else:
+                        exact = False
+            c = cand_index[cand]
+            self.has_crosstabs[i, c] = True
+            self.crosstabs[i, c] = row
+            self.crosstabs_int[i, c] = ints
+        return exact
+
+    def _crosstabs_dict(self, i, order):
+        """Crosstabs of poll i, candidates in `order` (the original key order)."""
+        result = {}
+        for cand in order:
+            c = self._cand_index[cand]
+            by_category = result.setdefault(cand, {})
+            for g in np.nonzero(~np.isnan(self.crosstabs[i, c]))[0]:
+                category, group = self.groups[g]
+                by_category.setdefault(category, {})[group] = _json_number(
+                    self.crosstabs[i, c, g], self.crosstabs_int[i, c, g])
+        return result
+
+    def poll(self, i):
+        """Poll i as a JSON-schema dict."""
+        extras = self.extras[i] or {}
+        result = {}
+        for key in self.layouts[self.layout[i]]:
+            if key in extras:
+                result[key] = extras[key]
+            elif key == "id":
+                result[key] = self.ids[i]
+            elif key == "pollster":
+                result[key] = self.pollsters[self.pollster[i]]
+            elif key == "state":
+                result[key] = self.states[self.state[i]]
+            elif key == "date":
+                result[key] = date.fromordinal(int(self.day[i])).isoformat()
+            elif key == "sampleSize":
+                result[key] = None if np.isnan(self.sample[i]) else _json_number(self.sample[i], self.sample_int[i])
+            elif key == "crosstabs":
+                # No order is interned for a poll without crosstabs
+                result[key] = (self._crosstabs_dict(i, self.crosstab_orders[self.crosstab_order[i]])
+                               if self.has_crosstabs[i].any() else None)
+            else:
+                c = self._cand_index[key]
+                v = self.toplines[i, c]
+                result[key] = None if np.isnan(v) else _json_number(v, self.toplines_int[i, c])
+        return result
+
+    def to_polls(self):
+        return [self.poll(i) for i in range(len(self))]
+
+    def columns(self, candidates):
+        """Column index per candidate, -1 for candidates no poll has."""
+        return np.array([self._cand_index.get(c, -1) for c in candidates], dtype=np.intp)
+
+    def toplines_for(self, candidates):
+        """polls x len(candidates) toplines; all-NaN columns for unknown candidates."""
+        cols = self.columns(candidates)
+        values = self.toplines[:, np.maximum(cols, 0)] if len(self.candidates) else np.full((len(self), len(cols)), np.nan, np.float32)
+        values[:, cols < 0] = np.nan
+        return values
+
+    def missing_for(self, candidates):
+        """polls x len(candidates) mask of toplines that are null or absent (poll.get(c) is None)."""
+        missing = np.isnan(self.toplines_for(candidates))
+        for i, extras in enumerate(self.extras):
+            if extras:
+                for j, c in enumerate(candidates):
+                    if extras.get(c) is not None:
+                        missing[i, j] = False
+        return missing
+
+    def crosstabs_for(self, candidates, groups):
+        """polls x len(candidates) x len(groups) crosstab values, NaN where missing."""
+        out = np.full((len(self), len(candidates), len(groups)), np.nan, dtype=np.float32)
+        group_index = {g: i for i, g in enumerate(self.groups)}
+        for j, c in enumerate(self.columns(candidates)):
+            if c < 0:
+                continue
+            for k, g in enumerate(groups):
+                if g in group_index:
+                    out[:, j, k] = self.crosstabs[:, c, group_index[g]]
+        return out
+
+    def pollster_mask(self, predicate):
+        """Boolean per poll: predicate(pollster name) evaluated once per distinct pollster."""
+        by_code = np.array([name is not None and bool(predicate(name)) for name in self.pollsters] or [False])
+        return by_code[self.pollster]
+
+    def state_names(self):
+        """State per poll with a missing state read as "National"."""
+        return [self.states[code] or "National" for code in self.state]
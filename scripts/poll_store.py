@@ -0,0 +1,173 @@
+"""
+poll_store.py - Append-only poll database with atomic compaction.
+
+data/log/segment-NNNNNN.jsonl holds one JSON record per line:
+    {"op": "add", "id": ..., "poll": {...}}
+    {"op": "update", "id": ..., "fields": {...}}
+Segments roll over at SEGMENT_MAX_BYTES. data/polls.snapshot.json is the
+sorted result of every segment up to "compacted_through"; compaction writes a
+new snapshot to a temp file and renames it into place, so a crash leaves
+either the old or the new snapshot, never a half-written one. Opening the
+store replays the snapshot plus newer segments into an in-memory index, and a
+torn last line from an interrupted append is ignored.
+
+public/polls.json is no longer the database: export() regenerates it for the
+frontend. On first use the store is seeded from the existing polls.json.
+The snapshot and polls.json use the compact format in poll_format.py; older
+plain-list files are read as-is and upgraded when next written.
+"""
+import json
+import os
+import re
+from collections import Counter
+from pathlib import Path
+
+import poll_format
+
+STORE_DIR = Path(__file__).parent.parent / "data"
+POLLS_FILE = Path(__file__).parent.parent / "public" / "polls.json"
+
+SEGMENT_MAX_BYTES = 1024 * 1024
+COMPACT_AFTER_RECORDS = 1000
+
+
+def _fsync_write(path, data):
+    """Write bytes to path atomically: temp file, fsync, rename."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def _ends_with_newline(path):
+    """False if the last append to path was torn; the next append then starts a new segment."""
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        if f.tell() == 0:
+            return True
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) == b"\n"
+
+
+class PollStore:
+    def __init__(self, root=STORE_DIR, polls_file=POLLS_FILE):
+        self.root = Path(root)
+        self.snapshot_file = self.root / "polls.snapshot.json"
+        self.log_dir = self.root / "log"
+        self.polls_file = Path(polls_file)
+        self.index = {}
+        self.compacted_through = 0
+        self.pending_records = 0
+
+    @classmethod
+    def open(cls, root=STORE_DIR, polls_file=POLLS_FILE):
+        store = cls(root, polls_file)
+        if store.snapshot_file.exists():
+            with open(store.snapshot_file) as f:
+                snapshot = json.load(f)
+            store.compacted_through = snapshot["compacted_through"]
+            polls = poll_format.decode(snapshot if "format" in snapshot else snapshot["polls"])
+            store.index = {p["id"]: p for p in polls}
+        elif store.polls_file.exists() and not store._segments():
+            store.index = {p["id"]: p for p in poll_format.load(store.polls_file)}
+            print(f"  Seeded poll store from {store.polls_file.name} ({len(store.index)} polls)")
+            store.compact()
+        store._replay()
+        return store
+
+    def _segments(self):
+        """(number, path) of log segments, oldest first."""
+        if not self.log_dir.exists():
+            return []
+        found = []
+        for path in self.log_dir.glob("segment-*.jsonl"):
+            m = re.fullmatch(r"segment-(\d+)\.jsonl", path.name)
+            if m:
+                found.append((int(m.group(1)), path))
+        return sorted(found)
+
+    def _replay(self):
+        for number, path in self._segments():
+            if number <= self.compacted_through:
+                continue
+            with open(path) as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        print(f"  Ignoring torn record in {path.name}")
+                        continue
+                    self._apply(record)
+                    self.pending_records += 1
+
+    def _apply(self, record):
+        if record["op"] == "add":
+            self.index[record["id"]] = record["poll"]
+        elif record["op"] == "update" and record["id"] in self.index:
+            self.index[record["id"]] = {**self.index[record["id"]], **record["fields"]}
+
+    def _append(self, records):
+        """Append records to the current segment (rolling over when full) and fsync once."""
+        segments = self._segments()
+        number = max(segments[-1][0] if segments else 0, self.compacted_through)
+        path = self.log_dir / f"segment-{number:06d}.jsonl"
+        if number <= self.compacted_through or (path.exists() and (
+                path.stat().st_size >= SEGMENT_MAX_BYTES or not _ends_with_newline(path))):
+            number += 1
+            path = self.log_dir / f"segment-{number:06d}.jsonl"
+        self.log_dir.mkdir(parents=True, exist_ok=True)
+        with open(path, "a") as f:
+            for record in records:
+                f.write(json.dumps(record, separators=(",", ":")) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        for record in records:
+            self._apply(record)
+        self.pending_records += len(records)
+
+    def polls(self):
+        """All polls, newest first (fresh dicts, safe to mutate)."""
+        return sorted((dict(p) for p in self.index.values()), key=lambda p: p["date"], reverse=True)
+
+    def add(self, polls):
+        """Record new polls. Raises ValueError, before writing anything, if an id is already
+        in the store or repeated in `polls`; an add never replaces an existing poll."""
+        counts = Counter(p["id"] for p in polls)
+        taken = sorted(i for i, n in counts.items() if n > 1 or i in self.index)
+        if taken:
+            raise ValueError(f"Poll id(s) already in the store: {', '.join(taken)}")
+        self._append([{"op": "add", "id": p["id"], "poll": p} for p in polls])
+
+    def update(self, poll_id, fields):
+        """Record only the changed fields of an existing poll."""
+        if fields:
+            self._append([{"op": "update", "id": poll_id, "fields": fields}])
+
+    def put(self, poll):
+        """Record a modified copy of an existing poll as an update of the fields that changed."""
+        current = self.index.get(poll["id"], {})
+        self.update(poll["id"], {k: v for k, v in poll.items() if k not in current or current[k] != v})
+
+    def compact(self):
+        """Fold every segment into a new sorted snapshot, then delete the folded segments."""
+        segments = self._segments()
+        through = max(segments[-1][0] if segments else 0, self.compacted_through)
+        snapshot = poll_format.dumps(self.polls(), compacted_through=through)
+        _fsync_write(self.snapshot_file, snapshot.encode("utf-8"))
+        self.compacted_through = through
+        self.pending_records = 0
+        for number, path in segments:
+            if number <= through:
+                path.unlink(missing_ok=True)
+
+    def maybe_compact(self):
+        if self.pending_records >= COMPACT_AFTER_RECORDS:
+            print(f"  Compacting poll store ({self.pending_records} log records)")
+            self.compact()
+
+    def export(self, path=None):
+        """Write today's public/polls.json (newest first) for the frontend, atomically."""
+        _fsync_write(Path(path or self.polls_file), poll_format.dumps(self.polls()).encode("utf-8"))
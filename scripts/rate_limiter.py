@@ -0,0 +1,217 @@
+"""
+rate_limiter.py - Process-wide adaptive rate limiter for Anthropic API calls.
+
+One RateLimiter is shared by every worker thread in a run. Each call waits
+until both the requests-per-minute and input-tokens-per-minute buckets have
+room, then the estimate is reconciled against the response's real usage.
+The anthropic-ratelimit-* response headers keep the buckets in step with the
+server, and when it reports nothing left every thread pauses until the reset.
+RateLimitError is retried after retry-after (or jittered exponential backoff)
+instead of failing the call, and overloaded/5xx/connection errors are retried
+with the same backoff. Clients come from make_client(), which turns the SDK's
+own retries off: otherwise the SDK would absorb 429s before the limiter (and
+run_metrics' rate_limited counter) ever saw them. Nothing ever sleeps unless
+a limit requires it.
+"""
+import contextlib
+import os
+import random
+import threading
+import time
+from datetime import datetime, timezone
+
+import anthropic
+
+from run_metrics import METRICS
+
+DEFAULT_RPM = 50
+DEFAULT_TPM = 40000
+MAX_RETRIES = 5
+BACKOFF_BASE = 2.0
+BACKOFF_CAP = 60.0
+
+# Retried like a 429, but only the failing call backs off
+TRANSIENT_ERRORS = tuple(getattr(anthropic, name) for name in (
+    "APIConnectionError", "InternalServerError", "OverloadedError", "ServiceUnavailableError")
+    if hasattr(anthropic, name))
+
+
+def make_client(**kwargs):
+    """Anthropic client with SDK retries off, so RateLimiter is the only retry layer."""
+    return anthropic.Anthropic(api_key=os.environ["ANTHROPIC_API_KEY"], max_retries=0, **kwargs)
+
+
+class TokenBucket:
+    """Thread-safe token bucket refilled continuously at `per_minute` / 60 per second."""
+
+    def __init__(self, per_minute):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.tokens = float(per_minute)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, amount=1):
+        """Block until `amount` tokens are available, then take them."""
+        amount = min(float(amount), self.capacity)
+        while True:
+            with self.lock:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                wait = (amount - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def cap_at(self, remaining):
+        """Never believe we have more tokens than the server says are left."""
+        with self.lock:
+            self._refill()
+            self.tokens = min(self.tokens, float(remaining))
+
+    def adjust(self, delta):
+        """Charge (positive) or refund (negative) tokens after the fact. May go below zero."""
+        with self.lock:
+            self._refill()
+            self.tokens = min(self.capacity, self.tokens - delta)
+
+
+def estimate_input_tokens(kwargs):
+    """Rough input-token estimate (~4 chars per token) for a messages.create payload."""
+    chars = len(kwargs.get("system") or "")
+    for message in kwargs.get("messages", []):
+        content = message.get("content", "")
+        if isinstance(content, str):
+            chars += len(content)
+        else:
+            chars += sum(len(block.get("text", "")) for block in content if isinstance(block, dict))
+    return chars // 4 + 1
+
+
+def seconds_until(reset):
+    """Seconds from now until an RFC 3339 reset timestamp (0 if unparsable or past)."""
+    try:
+        when = datetime.fromisoformat(reset.replace("Z", "+00:00"))
+    except (AttributeError, ValueError):
+        return 0.0
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+def retry_after(error):
+    """Seconds the server asked us to wait in a 429, or None."""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+class RateLimiter:
+    """Requests-per-minute and tokens-per-minute limits shared across threads."""
+
+    def __init__(self, rpm=DEFAULT_RPM, tpm=DEFAULT_TPM, max_retries=MAX_RETRIES):
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.max_retries = max_retries
+        self.blocked_until = 0.0
+        self.lock = threading.Lock()
+
+    def block_for(self, seconds):
+        """Hold every caller for `seconds` (e.g. after a 429 or an exhausted limit)."""
+        with self.lock:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+    def _wait_if_blocked(self):
+        while True:
+            with self.lock:
+                delay = self.blocked_until - time.monotonic()
+            if delay <= 0:
+                return
+            time.sleep(delay)
+
+    def observe(self, headers):
+        """Sync the buckets with anthropic-ratelimit-* response headers."""
+        for kind, bucket in (("requests", self.requests), ("input-tokens", self.tokens)):
+            remaining = headers.get(f"anthropic-ratelimit-{kind}-remaining")
+            if remaining is None:
+                continue
+            try:
+                remaining = float(remaining)
+            except ValueError:
+                continue
+            bucket.cap_at(remaining)
+            if remaining <= 0:
+                self.block_for(seconds_until(headers.get(f"anthropic-ratelimit-{kind}-reset")))
+
+    def _attempt(self, fn, estimate, kwargs):
+        """fn(**kwargs) once there is room in both buckets, retrying 429s and transient errors."""
+        for attempt in range(self.max_retries + 1):
+            self._wait_if_blocked()
+            self.requests.acquire(1)
+            self.tokens.acquire(estimate)
+            try:
+                return fn(**kwargs)
+            except anthropic.RateLimitError as e:
+                METRICS.count("rate_limited")
+                if attempt == self.max_retries:
+                    raise
+                delay = retry_after(e)
+                if delay is None:
+                    delay = min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt)
+                delay *= 1 + random.random() / 4
+                print(f"    Rate limited, retrying in {delay:.1f}s (attempt {attempt + 1}/{self.max_retries})")
+                self.block_for(delay)
+            except TRANSIENT_ERRORS as e:
+                METRICS.count("api_errors")
+                if attempt == self.max_retries:
+                    raise
+                delay = min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt) * (1 + random.random() / 4)
+                print(f"    {type(e).__name__}, retrying in {delay:.1f}s (attempt {attempt + 1}/{self.max_retries})")
+                time.sleep(delay)
+
+    def _reconcile(self, message, estimate):
+        usage = getattr(message, "usage", None)
+        if usage is not None and getattr(usage, "input_tokens", None) is not None:
+            self.tokens.adjust(usage.input_tokens - estimate)
+
+    def call(self, fn, **kwargs):
+        """Run fn(**kwargs) (a messages.create-style call) inside the limits, retrying 429s.
+
+        fn may be a with_raw_response method; its headers are observed and the
+        parsed message is returned.
+        """
+        estimate = estimate_input_tokens(kwargs)
+        response = self._attempt(fn, estimate, kwargs)
+        if hasattr(response, "parse") and hasattr(response, "headers"):
+            self.observe(response.headers)
+            response = response.parse()
+        self._reconcile(response, estimate)
+        return response
+
+    @contextlib.contextmanager
+    def stream(self, client, **kwargs):
+        """client.messages.stream(**kwargs) inside the limits, yielding the open MessageStream.
+
+        A 429 arrives when the stream is opened, so it is retried like call().
+        """
+        estimate = estimate_input_tokens(kwargs)
+        managers = []
+
+        def open_stream(**kw):
+            manager = client.messages.stream(**kw)
+            opened = manager.__enter__()
+            managers.append(manager)
+            return opened
+
+        stream = self._attempt(open_stream, estimate, kwargs)
+        try:
+            self.observe(stream.response.headers)
+            yield stream
+            self._reconcile(stream.get_final_message(), estimate)
+        finally:
+            managers[-1].__exit__(None, None, None)
@@ -0,0 +1,260 @@
+"""
+run_metrics.py - Per-run timings, traffic, token usage and cost, written as JSON.
+
+One process-wide collector, METRICS, is fed from the places every run passes
+through: http_cache.get records bytes and latency per request, llm_cache.create
+records each response's `usage` (and whether it came from the cache), and the
+scripts wrap their phases and backfill strategies in METRICS.phase(...). At
+the end of a run METRICS.write() leaves .cache/run_metrics.json:
+
+    {"script": "backfill_polls", "wall_seconds": 412.3,
+     "phases": {"strategy:direct_pdf": {"calls": 9, "seconds": 88.1, "cost_usd": 0.05}, ...},
+     "http": {"requests": 31, "bytes": 18230411, "latency_p50": 0.41, "latency_p99": 2.3, ...},
+     "llm": {"requests": 40, "latency_p50": 6.2, "latency_p99": 31.0, ...},
+     "models": {"claude-haiku-4-5-20251001": {"input_tokens": ..., "cost_usd": 0.31}, ...},
+     "strategies": {"direct_pdf": {"attempts": 9, "successes": 6, "success_rate": 0.667}, ...},
+     "cost_usd": 0.42}
+
+A phase also collects the cost of the model calls made inside it (innermost
+phase, same thread), which is what tells whether a backfill strategy pays for
+itself. Phase seconds are summed across worker threads, so with --workers 8
+the strategy phases add up to more than the wall time; they compare
+strategies with each other, wall_seconds is the run. Costs are estimates
+from PRICES; cached responses cost nothing and batch results are half price.
+
+--profile on either script also dumps cProfile stats (see profiled()).
+"""
+import cProfile
+import contextlib
+import json
+import pstats
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+from paths import CACHE_ROOT
+
+METRICS_FILE = CACHE_ROOT / "run_metrics.json"
+
+# USD per million (input, output) tokens, matched by model-name prefix
+PRICES = {
+    "claude-opus-4-6": (5.00, 25.00),
+    "claude-opus-4-5": (5.00, 25.00),
+    "claude-opus-4": (15.00, 75.00),
+    "claude-sonnet-4": (3.00, 15.00),
+    "claude-haiku-4-5": (1.00, 5.00),
+    "claude-3-5-haiku": (0.80, 4.00),
+}
+CACHE_WRITE_MULTIPLIER = 1.25  # prompt-cache writes, relative to input price
+CACHE_READ_MULTIPLIER = 0.10   # prompt-cache reads
+WEB_SEARCH_PRICE = 10.00 / 1000
+BATCH_DISCOUNT = 0.5
+PROFILE_TOP = 30
+
+USAGE_FIELDS = ["input_tokens", "output_tokens", "cache_creation_input_tokens", "cache_read_input_tokens"]
+
+
+def price_for(model):
+    """(input, output) USD per million tokens, or None for an unknown model."""
+    for prefix in sorted(PRICES, key=len, reverse=True):
+        if (model or "").startswith(prefix):
+            return PRICES[prefix]
+    return None
+
+
+def estimate_cost(model, usage, web_searches=0, batch=False):
+    """Estimated USD for one response's token counts ({field: tokens})."""
+    price = price_for(model)
+    if price is None:
+        return 0.0
+    input_price, output_price = price
+    cost = (usage.get("input_tokens", 0) * input_price
+            + usage.get("cache_creation_input_tokens", 0) * input_price * CACHE_WRITE_MULTIPLIER
+            + usage.get("cache_read_input_tokens", 0) * input_price * CACHE_READ_MULTIPLIER
+            + usage.get("output_tokens", 0) * output_price) / 1e6
+    if batch:
+        cost *= BATCH_DISCOUNT
+    return cost + web_searches * WEB_SEARCH_PRICE
+
+
+def usage_counts(response):
+    """({field: tokens}, web search requests) from a Message's usage; zeros if absent."""
+    usage = getattr(response, "usage", None)
+    counts = {field: getattr(usage, field, None) or 0 for field in USAGE_FIELDS}
+    server_tools = getattr(usage, "server_tool_use", None)
+    return counts, getattr(server_tools, "web_search_requests", None) or 0
+
+
+def percentile(values, q):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return round(ordered[min(len(ordered) - 1, int(q / 100 * len(ordered)))], 4)
+
+
+def latency_summary(values):
+    """Total, p50, p95, p99 and max of a list of seconds."""
+    return {
+        "latency_seconds": round(sum(values), 3),
+        "latency_p50": percentile(values, 50),
+        "latency_p95": percentile(values, 95),
+        "latency_p99": percentile(values, 99),
+        "latency_max": round(max(values), 4) if values else None,
+    }
+
+
+class RunMetrics:
+    """Thread-safe counters for one run."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started = time.time()
+        self.phases = {}
+        self.http = {"requests": 0, "from_cache": 0, "errors": 0, "bytes": 0}
+        self.http_latencies = []
+        self.llm_latencies = []
+        self.models = {}
+        self.call_sites = {}
+        self.strategies = {}
+        self.counters = {}
+        self.marks = {}
+        self._local = threading.local()
+
+    def _phase_entry(self, name):
+        return self.phases.setdefault(name, {"calls": 0, "seconds": 0.0, "cost_usd": 0.0})
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        """Accumulate the wall time of the enclosed block, and the model cost it incurs
+        on this thread, under phases[name]."""
+        stack = self._local.__dict__.setdefault("phases", [])
+        stack.append(name)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            stack.pop()
+            with self._lock:
+                entry = self._phase_entry(name)
+                entry["calls"] += 1
+                entry["seconds"] += elapsed
+
+    def timed(self, name, fn):
+        """fn wrapped in phase(name), for handing to an executor."""
+        def run(*args, **kwargs):
+            with self.phase(name):
+                return fn(*args, **kwargs)
+        return run
+
+    def record_http(self, url, status, nbytes, seconds, from_cache=False):
+        """One GET: bytes actually transferred (0 for a 304) and round-trip seconds.
+        status 0 is a request that failed without a response."""
+        with self._lock:
+            self.http["requests"] += 1
+            self.http["bytes"] += nbytes
+            self.http["from_cache"] += bool(from_cache)
+            self.http["errors"] += status == 0 or status >= 400
+            self.http_latencies.append(seconds)
+
+    def record_message(self, call_site, response, seconds=None, cached=False, batch=False):
+        """Tokens and estimated cost of one model response. Cached responses cost nothing."""
+        model = getattr(response, "model", None) or "unknown"
+        counts, searches = usage_counts(response)
+        cost = 0.0 if cached else estimate_cost(model, counts, searches, batch)
+        stack = self._local.__dict__.get("phases")
+        with self._lock:
+            if stack:
+                self._phase_entry(stack[-1])["cost_usd"] += cost
+            if seconds is not None:
+                self.llm_latencies.append(seconds)
+            for key, table in ((model, self.models), (call_site, self.call_sites)):
+                entry = table.setdefault(key, {"calls": 0, "cached_calls": 0, "batch_calls": 0,
+                                               **{f: 0 for f in USAGE_FIELDS},
+                                               "web_search_requests": 0, "seconds": 0.0, "cost_usd": 0.0})
+                entry["calls"] += 1
+                if cached:
+                    entry["cached_calls"] += 1
+                    continue
+                entry["batch_calls"] += bool(batch)
+                for field, tokens in counts.items():
+                    entry[field] += tokens
+                entry["web_search_requests"] += searches
+                entry["seconds"] += seconds or 0.0
+                entry["cost_usd"] += cost
+
+    def record_strategy(self, name, success):
+        with self._lock:
+            entry = self.strategies.setdefault(name, {"attempts": 0, "successes": 0})
+            entry["attempts"] += 1
+            entry["successes"] += bool(success)
+
+    def mark(self, name):
+        """Seconds from the start of the run to the first mark(name), e.g. the first merged poll."""
+        with self._lock:
+            self.marks.setdefault(name, round(time.time() - self.started, 3))
+
+    def count(self, name, n=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def report(self, **extra):
+        with self._lock:
+            phases = {name: {"calls": e["calls"], "seconds": round(e["seconds"], 3), "cost_usd": round(e["cost_usd"], 6)}
+                      for name, e in self.phases.items()}
+            http = {**self.http, **latency_summary(self.http_latencies)}
+            llm = {"requests": len(self.llm_latencies), **latency_summary(self.llm_latencies)}
+            models, call_sites = ({key: {**e, "seconds": round(e["seconds"], 3), "cost_usd": round(e["cost_usd"], 6)}
+                                   for key, e in table.items()} for table in (self.models, self.call_sites))
+            strategies = {name: {**e, "success_rate": round(e["successes"] / e["attempts"], 3) if e["attempts"] else None}
+                          for name, e in self.strategies.items()}
+            counters = dict(self.counters)
+            marks = dict(self.marks)
+        return {
+            **extra,
+            "started": datetime.utcfromtimestamp(self.started).isoformat(timespec="seconds") + "Z",
+            "wall_seconds": round(time.time() - self.started, 3),
+            "phases": phases,
+            "http": http,
+            "llm": llm,
+            "models": models,
+            "call_sites": call_sites,
+            "strategies": strategies,
+            "counters": counters,
+            "marks": marks,
+            "cost_usd": round(sum(e["cost_usd"] for e in models.values()), 6),
+        }
+
+    def write(self, path=METRICS_FILE, **extra):
+        report = self.report(**extra)
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_text(json.dumps(report, indent=2))
+        tmp.replace(path)
+        print(f"\nRun metrics: {report['wall_seconds']:.1f}s wall, {report['http']['requests']} HTTP requests "
+              f"({report['http']['bytes'] / 1e6:.1f} MB), est. ${report['cost_usd']:.4f} -> {path}")
+        return report
+
+
+METRICS = RunMetrics()
+
+
+@contextlib.contextmanager
+def profiled(enabled, name):
+    """cProfile the enclosed block (calling thread only) into .cache/<name>.prof and print the top entries."""
+    if not enabled:
+        yield
+        return
+    profile = cProfile.Profile()
+    profile.enable()
+    try:
+        yield
+    finally:
+        profile.disable()
+        path = CACHE_ROOT / f"{name}.prof"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        profile.dump_stats(path)
+        print(f"\nProfile written to {path} (python -m pstats {path}); top {PROFILE_TOP} by cumulative time:")
+        pstats.Stats(profile).sort_stats("cumulative").print_stats(PROFILE_TOP)
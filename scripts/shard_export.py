@@ -0,0 +1,132 @@
+"""
+shard_export.py - Content-hashed, precompressed data files for the frontend.
+
+The frontend used to fetch /polls.json?t=<now>, which defeats every HTTP
+cache. This writes public/data/:
+
+    polls-<state>-<YYYY-MM>-<hash>.json    one shard per state and month (poll_format)
+    aggregates-<hash>.json, trends-<hash>.json
+    manifest.json                          lists every file above
+
+A file's name changes only when its content does, so shards are served with
+a one-year immutable Cache-Control (see vercel.json) and only manifest.json
+is revalidated on each visit; a repeat visit downloads just the shards that
+changed. Neither the hashed copies nor the manifest carry a timestamp, so
+re-exporting unchanged data rewrites nothing and the workflow has nothing
+to commit. On first paint the app fetches only the newest few months of shards
+and loads the rest in the background. Every data file also gets .gz and .br
+siblings for hosts that serve precompressed assets (.br only when the brotli
+package is installed). Files no longer listed in the manifest are removed.
+
+write_artifacts() is what fetch_polls.py and backfill_polls.py call after
+writing polls.json: it rebuilds the artifacts, then exports.
+
+Run manually:  python scripts/shard_export.py
+"""
+import gzip
+import hashlib
+import json
+import re
+from collections import defaultdict
+from pathlib import Path
+
+from aggregate import AGGREGATES_FILE, write_aggregates
+import poll_format
+from trend import TRENDS_FILE, write_trends
+
+SHARD_DIR = Path(__file__).parent.parent / "public" / "data"
+MANIFEST_FILE = SHARD_DIR / "manifest.json"
+MANIFEST_VERSION = 1
+HASH_CHARS = 12
+
+
+def slug(text):
+    return re.sub(r"[^a-z0-9]+", "-", text.lower()).strip("-") or "unknown"
+
+
+def _write_if_changed(path, data):
+    if path.exists() and path.read_bytes() == data:
+        return
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_bytes(data)
+    tmp.replace(path)
+
+
+def write_hashed(directory, prefix, data, brotli=None):
+    """Write data as <prefix>-<hash>.json plus compressed siblings; return the file name."""
+    name = f"{prefix}-{hashlib.sha256(data).hexdigest()[:HASH_CHARS]}.json"
+    _write_if_changed(directory / name, data)
+    # mtime=0 keeps the .gz bytes identical across runs, so unchanged shards stay unchanged
+    _write_if_changed(directory / f"{name}.gz", gzip.compress(data, compresslevel=9, mtime=0))
+    if brotli is not None:
+        _write_if_changed(directory / f"{name}.br", brotli.compress(data))
+    return name
+
+
+def artifact_bytes(path):
+    """An artifact JSON, compact, without the "generated" timestamp older runs stamped on it."""
+    payload = json.loads(Path(path).read_text())
+    payload.pop("generated", None)
+    return json.dumps(payload, separators=(",", ":")).encode("utf-8")
+
+
+def shard_polls(polls):
+    """{(state, "YYYY-MM"): [polls, newest first]}."""
+    shards = defaultdict(list)
+    for poll in polls:
+        shards[(poll.get("state") or "National", (poll.get("date") or "unknown")[:7])].append(poll)
+    for shard in shards.values():
+        shard.sort(key=lambda p: p.get("date") or "", reverse=True)
+    return shards
+
+
+def export(polls, directory=SHARD_DIR, artifacts=None):
+    """Write shards, hashed copies of the artifacts and the manifest; prune stale files."""
+    try:
+        import brotli
+    except ImportError:
+        brotli = None
+        print("  brotli not installed, skipping .br files")
+    if artifacts is None:
+        artifacts = {"aggregates": AGGREGATES_FILE, "trends": TRENDS_FILE}
+
+    directory.mkdir(parents=True, exist_ok=True)
+    manifest = {"version": MANIFEST_VERSION, "polls": len(polls), "shards": [], "files": {}}
+    for (state, month), shard in sorted(shard_polls(polls).items()):
+        data = poll_format.dumps(shard).encode("utf-8")
+        name = write_hashed(directory, f"polls-{slug(state)}-{month}", data, brotli)
+        manifest["shards"].append({"state": state, "month": month, "file": name,
+                                   "polls": len(shard), "bytes": len(data)})
+    for key, path in artifacts.items():
+        if Path(path).exists():
+            manifest["files"][key] = write_hashed(directory, key, artifact_bytes(path), brotli)
+
+    keep = {MANIFEST_FILE.name}
+    for name in [s["file"] for s in manifest["shards"]] + list(manifest["files"].values()):
+        keep.update({name, f"{name}.gz", f"{name}.br"})
+    removed = 0
+    for path in directory.iterdir():
+        if path.is_file() and path.name not in keep:
+            path.unlink()
+            removed += 1
+
+    _write_if_changed(directory / MANIFEST_FILE.name, json.dumps(manifest, indent=2).encode("utf-8"))
+    print(f"  Exported {len(manifest['shards'])} shards to {directory.name}/ ({removed} stale files removed)")
+    return manifest
+
+
+def write_artifacts(polls):
+    """Regenerate the frontend's aggregates.json and trends.json, then the hashed shards in public/data/."""
+    write_aggregates(polls)
+    write_trends(polls)
+    export(polls)
+
+
+def main():
+    from poll_store import PollStore
+
+    export(PollStore.open().polls())
+
+
+if __name__ == "__main__":
+    main()
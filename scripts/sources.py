@@ -0,0 +1,137 @@
+"""
+sources.py - Registry of the places fetch_polls.py gets polls from.
+
+A source adapter subclasses Source and is registered with @register. Each
+run, fetch_polls runs every source that is due at the same time, one thread
+per source, and merges the polls they emit as they arrive, so an added
+source costs its own latency in parallel, not on top of the others:
+
+    @register
+    class PollsterReleases(Source):
+        name = "pollster_releases"
+        url = "https://example.com/polls"
+        interval_hours = 24          # at most once a day; 0 runs every time
+        timeout = 15                 # seconds per HTTP request
+
+        def parse(self, resp):
+            for row in ...:
+                yield {"pollster": ..., "date": ..., ...}   # SYSTEM_PROMPT schema
+
+fetch() is a cached, conditional GET through http_cache, which keeps one
+keep-alive session per host and caps concurrent requests to it. Sources
+that are not a single page override run(). Anything that marks input as
+handled is saved in commit(), which runs only after the store is written.
+When each source last ran is kept in .cache/source_state.json (also saved
+after the write); a source is skipped until interval_hours have passed since
+its last successful run.
+"""
+import json
+import time
+
+import http_cache
+from paths import CACHE_ROOT
+from run_metrics import METRICS
+
+STATE_FILE = CACHE_ROOT / "source_state.json"
+
+BROWSER_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "en-US,en;q=0.9",
+}
+
+SOURCES = {}  # name -> Source instance, in registration order
+
+
+class Source:
+    """One place polls come from: fetch() a page, parse() it into poll dicts."""
+
+    name = None
+    url = None
+    interval_hours = 0
+    timeout = 20
+    headers = BROWSER_HEADERS
+
+    def log(self, message):
+        print(f"  [{self.name}] {message}")
+
+    def fetch(self):
+        resp = http_cache.get(self.url, headers=self.headers, timeout=self.timeout)
+        resp.raise_for_status()
+        self.log(f"Got {len(resp.content)} bytes{' (not modified, from cache)' if resp.from_cache else ''}")
+        return resp
+
+    def parse(self, resp):
+        """Yield poll dicts in fetch_polls' SYSTEM_PROMPT schema."""
+        raise NotImplementedError
+
+    def run(self, emit, existing):
+        """Pass every poll this source has to emit(). `existing` is a snapshot of the store."""
+        for poll in self.parse(self.fetch()):
+            emit(poll)
+
+    def commit(self):
+        """Called once the polls from run() are merged and the store is written; a
+        source that remembers what it has already handled saves that here, not in
+        run(), so a run that fails before the write is retried in full next time."""
+
+
+def register(cls):
+    """Class decorator adding an instance of a Source subclass to SOURCES."""
+    SOURCES[cls.name] = cls()
+    return cls
+
+
+def load_state():
+    try:
+        with open(STATE_FILE) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_state(state):
+    STATE_FILE.parent.mkdir(parents=True, exist_ok=True)
+    tmp = STATE_FILE.with_name(STATE_FILE.name + ".tmp")
+    tmp.write_text(json.dumps(state, indent=1, sort_keys=True))
+    tmp.replace(STATE_FILE)
+
+
+def due(state, names=None, now=None):
+    """Sources to run: the named ones regardless of schedule, else every source whose interval has passed."""
+    if names:
+        return [SOURCES[name] for name in names]
+    now = time.time() if now is None else now
+    return [source for source in SOURCES.values()
+            if now - state.get(source.name, {}).get("last_success", 0) >= source.interval_hours * 3600]
+
+
+def run_source(source, existing, emit, state):
+    """run() one source on this thread, counting what it emits and recording the outcome in `state`.
+
+    Errors are logged and recorded rather than raised, so one broken site does
+    not stop the others.
+    """
+    found = 0
+
+    def counted(poll):
+        nonlocal found
+        found += 1
+        emit(poll)
+
+    started = time.time()
+    entry = {"last_attempt": started, "seconds": None, "polls": 0, "error": None}
+    try:
+        with METRICS.phase(f"source:{source.name}"):
+            source.run(counted, existing)
+        entry["last_success"] = started
+    except Exception as e:
+        source.log(f"Error after {found} poll(s): {e}")
+        entry["error"] = str(e)
+    entry["seconds"] = round(time.time() - started, 3)
+    entry["polls"] = found
+    METRICS.record_strategy(f"source:{source.name}", entry["error"] is None)
+    METRICS.count(f"polls_from:{source.name}", found)
+    # Each source owns its own key, so concurrent updates do not collide
+    state[source.name] = {**state.get(source.name, {}), **entry}
+    return found
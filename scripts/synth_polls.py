@@ -0,0 +1,126 @@
+"""
+synth_polls.py - Seeded generator of realistic synthetic polls.
+
+Polls follow the current polls.json schema: the 21 tracker candidates (about
+ten with numbers, the rest null), integer sample sizes, mostly-National
+states, pollster names drawn from the real ones (including the alias
+spellings dedup.py has to reconcile) and, optionally, full 18-group
+crosstabs for every candidate with a topline. The same seed always gives the
+same polls, so benchmark runs are comparable.
+
+Write a file:  python scripts/synth_polls.py 10000 --output /tmp/polls.json
+"""
+import argparse
+import random
+from datetime import date, timedelta
+
+from aggregate import CANDIDATES
+import poll_format
+
+# Rough national support, used as the mean of each candidate's topline (1 if unlisted)
+POPULARITY = {
+    "harris": 24, "newsom": 20, "buttigieg": 11, "ocasio": 10, "shapiro": 5, "pritzker": 3,
+    "booker": 3, "whitmer": 3, "beshear": 2, "kelly": 2, "moore": 1, "slotkin": 1,
+    "sanders": 6, "gallego": 1, "warnock": 1, "ossoff": 1, "klobuchar": 1, "khanna": 1,
+    "cooper": 1, "murphy": 1, "stewart": 1,
+}
+
+POLLSTERS = [
+    "Echelon Insights", "Emerson College", "Emerson College Polling", "UNH Survey Center",
+    "University of New Hampshire", "Morning Consult", "Harvard Harris", "Harvard CAPS/Harris",
+    "J.L. Partners", "YouGov/Economist", "Focaldata", "Suffolk University", "Yale Youth Poll",
+    "Quinnipiac", "Marist", "Monmouth", "Siena", "EPIC-MRA", "Nevada Independent",
+    "Des Moines Register/Selzer", "McLaughlin & Associates", "AtlasIntel", "co/efficient",
+]
+
+STATES = [
+    ("National", 50), ("New Hampshire", 8), ("Iowa", 6), ("South Carolina", 6), ("Nevada", 5),
+    ("California", 4), ("Michigan", 4), ("Pennsylvania", 3), ("Georgia", 3), ("Illinois", 2),
+    ("North Carolina", 2), ("Texas", 2), ("Virginia", 2), ("Florida", 2), ("Arizona", 1),
+]
+
+CROSSTAB_GROUPS = [
+    ("gender", ["Men", "Women"]),
+    ("age", ["18-34", "35-49", "50-64", "65+"]),
+    ("race", ["White", "Black", "Hispanic", "Other"]),
+    ("education", ["No college", "Some college", "College grad", "Postgrad"]),
+    ("ideology", ["Very liberal", "Somewhat liberal", "Moderate", "Conservative"]),
+]
+
+START = date(2025, 4, 1)
+SPAN_DAYS = 730
+
+
+def popularity(cand):
+    return POPULARITY.get(cand, 1)
+
+
+def make_poll(rng, crosstabs=True, start=START, span_days=SPAN_DAYS):
+    state = rng.choices([s for s, _ in STATES], weights=[w for _, w in STATES])[0]
+    when = (start + timedelta(days=rng.randrange(span_days))).isoformat()
+    pollster = rng.choice(POLLSTERS)
+    tested = set(rng.sample(CANDIDATES, rng.randint(5, len(CANDIDATES))))
+    poll = {
+        "id": None,
+        "pollster": pollster,
+        "date": when,
+        "state": state,
+        "sampleSize": rng.randrange(300, 3000, 10),
+        "source_url": f"https://example.com/{pollster.lower().replace(' ', '-')}/{when}",
+    }
+    for cand in CANDIDATES:
+        if cand in tested:
+            value = max(0, round(rng.gauss(popularity(cand), 2 + popularity(cand) / 4)))
+            poll[cand] = float(value) if rng.random() < 0.1 else value
+        else:
+            poll[cand] = None
+    if crosstabs and rng.random() < 0.8:
+        poll["crosstabs"] = {
+            cand: {category: {group: max(0, round(poll[cand] + rng.gauss(0, 4))) for group in groups}
+                   for category, groups in CROSSTAB_GROUPS}
+            for cand in CANDIDATES if poll[cand] is not None
+        }
+    else:
+        poll["crosstabs"] = None
+    slug = state.lower().replace(" ", "-")
+    poll["id"] = f"auto-{when}-{slug}-{pollster.lower().replace(' ', '')[:12]}-{rng.getrandbits(32):08x}"
+    return poll
+
+
+def generate(n, seed=0, crosstabs=True):
+    rng = random.Random(seed)
+    return [make_poll(rng, crosstabs) for _ in range(n)]
+
+
+def near_duplicates(polls, n, seed=0):
+    """n re-reports of existing polls: shifted a day, alias spelling, toplines off by one."""
+    rng = random.Random(seed)
+    variants = []
+    for poll in rng.sample(polls, min(n, len(polls))):
+        copy = {k: v for k, v in poll.items() if k != "id"}
+        copy["date"] = (date.fromisoformat(poll["date"]) + timedelta(days=rng.choice([0, 1, -1]))).isoformat()
+        copy["pollster"] = poll["pollster"] + rng.choice(["", " Polling", " Poll"])
+        for cand in CANDIDATES:
+            if isinstance(copy.get(cand), (int, float)):
+                copy[cand] = max(0, copy[cand] + rng.choice([-1, 0, 0, 1]))
+        variants.append(copy)
+    return variants
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write seeded synthetic polls in the polls.json format")
+    parser.add_argument("count", type=int, help="Number of polls")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed (default: 0)")
+    parser.add_argument("--no-crosstabs", action="store_true", help="Leave crosstabs null on every poll")
+    parser.add_argument("--output", required=True, help="File to write")
+    args = parser.parse_args()
+
+    polls = generate(args.count, seed=args.seed, crosstabs=not args.no_crosstabs)
+    polls.sort(key=lambda p: p["date"], reverse=True)
+    with open(args.output, "w") as f:
+        f.write(poll_format.dumps(polls))
+    print(f"Wrote {len(polls)} polls to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+"""
+trend.py - Daily weighted-average trend lines per candidate and state.
+
+The trend value on day d is the average the tracker would have shown on d:
+every poll dated on or before d, weighted exp(-(d - poll_date) / 60) *
+sqrt(sampleSize or 500), missing values left out of both sums. Recomputing
+that for every day scans every poll each time; instead one forward pass over
+date-sorted polls carries the two sums along,
+
+    num_d = num_(d-1) * exp(-gap / 60) + sum(w * value)  over polls dated d
+    den_d = den_(d-1) * exp(-gap / 60) + sum(w)          over polls with a value
+
+vectorized over every (state, candidate) cell. Between poll dates num and den
+decay by the same factor, so the average only moves on days with polls. The
+artifact therefore stores change points per state and candidate,
+[day offset from "start", value], which expand to the daily series.
+
+The final sums are kept in "carry", so when fetch_polls only appends polls
+dated after "through" the series is extended from there instead of rebuilt.
+
+Run manually:  python scripts/trend.py
+"""
+import hashlib
+import json
+from datetime import date, timedelta
+from pathlib import Path
+
+import numpy as np
+
+from aggregate import CANDIDATES, RECENCY_DAYS, sample_weights
+from poll_matrix import PollMatrix
+
+TRENDS_FILE = Path(__file__).parent.parent / "public" / "trends.json"
+
+ROUND_DIGITS = 2
+
+
+def poll_digest(poll):
+    """Order-independent fingerprint contribution of one poll."""
+    fields = {k: poll.get(k) for k in ["id", "date", "state", "sampleSize"] + CANDIDATES}
+    blob = json.dumps(fields, sort_keys=True, default=str)
+    return int(hashlib.sha256(blob.encode("utf-8")).hexdigest()[:16], 16)
+
+
+def fingerprint(polls):
+    result = 0
+    for poll in polls:
+        result ^= poll_digest(poll)
+    return f"{result:016x}"
+
+
+def _forward(polls, states, carry_num, carry_den, start_day, last_day):
+    """Run the recurrence over polls (all dated after last_day) from the carried sums.
+
+    Returns (steps {state: {cand: [[offset, value], ...]}}, num, den, last_day).
+    """
+    matrix = PollMatrix.from_polls(polls, CANDIDATES, with_crosstabs=False)
+    unique_days, day_index = np.unique(matrix.day, return_inverse=True)
+
+    values = matrix.toplines_for(CANDIDATES).astype(float)
+    sizes = sample_weights(matrix)[:, None]
+    present = ~np.isnan(values)
+    weighted = np.where(present, values, 0.0) * sizes
+    weights = present * sizes
+
+    # Per-day additions to every state row (row 0 is "All")
+    state_rows = np.array([states.index(s) for s in matrix.state_names()])
+    add_num = np.zeros((len(unique_days), len(states), len(CANDIDATES)))
+    add_den = np.zeros_like(add_num)
+    for rows in (np.zeros_like(state_rows), state_rows):
+        np.add.at(add_num, (day_index, rows), weighted)
+        np.add.at(add_den, (day_index, rows), weights)
+
+    num, den = carry_num.copy(), carry_den.copy()
+    previous = np.where(den > 0, np.round(num / np.where(den > 0, den, 1), ROUND_DIGITS), np.nan)
+    steps = {}
+    for k, day in enumerate(unique_days):
+        decay = np.exp(-(day - last_day) / RECENCY_DAYS) if last_day is not None else 1.0
+        num = num * decay + add_num[k]
+        den = den * decay + add_den[k]
+        last_day = int(day)
+        current = np.where(den > 0, np.round(num / np.where(den > 0, den, 1), ROUND_DIGITS), np.nan)
+        changed = (current != previous) & ~np.isnan(current)
+        for s, c in zip(*np.nonzero(changed)):
+            steps.setdefault(states[s], {}).setdefault(CANDIDATES[c], []).append(
+                [last_day - start_day, float(current[s, c])])
+        previous = current
+    return steps, num, den, last_day
+
+
+def build_trends(polls):
+    """Full rebuild of the trend artifact from every dated poll."""
+    polls = [p for p in polls if p.get("date")]
+    if not polls:
+        return None
+    states = ["All"] + sorted({p.get("state") or "National" for p in polls})
+    start_day = min(date.fromisoformat(p["date"]).toordinal() for p in polls)
+    zeros = np.zeros((len(states), len(CANDIDATES)))
+    steps, num, den, last_day = _forward(polls, states, zeros, zeros, start_day, None)
+    return _artifact(polls, states, steps, num, den, start_day, last_day, fingerprint(polls))
+
+
+def extend_trends(artifact, polls):
+    """Extend a previous artifact with polls appended after its "through" date.
+
+    Returns None when that is not possible (a poll before "through" was added,
+    changed or removed, e.g. by backfill); the caller then rebuilds.
+    """
+    through = date.fromisoformat(artifact["through"]).toordinal()
+    polls = [p for p in polls if p.get("date")]
+    old = [p for p in polls if date.fromisoformat(p["date"]).toordinal() <= through]
+    new = [p for p in polls if date.fromisoformat(p["date"]).toordinal() > through]
+    if fingerprint(old) != artifact["carry"]["fingerprint"]:
+        return None
+    if not new:
+        return artifact
+
+    states = list(artifact["carry"]["states"])
+    for state in sorted({p.get("state") or "National" for p in new}):
+        if state not in states:
+            states.append(state)
+    num = np.zeros((len(states), len(CANDIDATES)))
+    den = np.zeros_like(num)
+    for i, state in enumerate(artifact["carry"]["states"]):
+        num[i] = artifact["carry"]["num"][i]
+        den[i] = artifact["carry"]["den"][i]
+
+    start_day = date.fromisoformat(artifact["start"]).toordinal()
+    steps, num, den, last_day = _forward(new, states, num, den, start_day, through)
+    merged = {state: {cand: list(points) for cand, points in by_cand.items()}
+              for state, by_cand in artifact["states"].items()}
+    for state, by_cand in steps.items():
+        for cand, points in by_cand.items():
+            merged.setdefault(state, {}).setdefault(cand, []).extend(points)
+    return _artifact(polls, states, merged, num, den, start_day, last_day, fingerprint(polls))
+
+
+def _artifact(polls, states, steps, num, den, start_day, last_day, fp):
+    return {
+        "polls": len(polls),
+        "start": date.fromordinal(start_day).isoformat(),
+        "through": date.fromordinal(last_day).isoformat(),
+        "candidates": CANDIDATES,
+        "states": steps,
+        "carry": {"fingerprint": fp, "states": states, "num": num.tolist(), "den": den.tolist()},
+    }
+
+
+def daily_series(artifact, state, cand):
+    """Expand change points to [(iso date, value or None)] for every day start..through."""
+    start = date.fromisoformat(artifact["start"])
+    total = (date.fromisoformat(artifact["through"]) - start).days + 1
+    series = [None] * total
+    points = artifact["states"].get(state, {}).get(cand, [])
+    for k, (offset, value) in enumerate(points):
+        end = points[k + 1][0] if k + 1 < len(points) else total
+        series[offset:end] = [value] * (end - offset)
+    return [((start + timedelta(days=i)).isoformat(), v) for i, v in enumerate(series)]
+
+
+def write_trends(polls, path=TRENDS_FILE):
+    artifact = None
+    if path.exists():
+        try:
+            with open(path) as f:
+                artifact = extend_trends(json.load(f), polls)
+        except (KeyError, ValueError):
+            artifact = None
+        if artifact is not None:
+            print(f"  Extended trends through {artifact['through']}")
+    if artifact is None:
+        artifact = build_trends(polls)
+        if artifact is None:
+            return
+        print(f"  Rebuilt trends from {artifact['polls']} polls")
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w") as f:
+        json.dump(artifact, f, separators=(",", ":"))
+    tmp.replace(path)
+
+
+def main():
+    from poll_store import PollStore
+
+    write_trends(PollStore.open().polls())
+
+
+if __name__ == "__main__":
+    main()
@@ -32,6 +32,11 @@ const GROUP_COLORS = ["#1a6bff","#e63946","#2a9d8f","#f4a261","#9b5de5","#e9c46a
 // localStorage key for local edits
 const LS_KEY = "poll_delta_2028_v2";
 
+// Months of poll shards (newest first) fetched before the first render. The
+// aggregates and trends artifacts already cover every poll, so older shards only
+// feed the poll table and crosstabs and are loaded in the background.
+const INITIAL_SHARD_MONTHS = 3;
+
 function loadDelta() {
   try {
     const saved = localStorage.getItem(LS_KEY);
@@ -44,6 +49,30 @@ function saveDelta(delta) {
   try { localStorage.setItem(LS_KEY, JSON.stringify(delta)); } catch {}
 }
 
+// polls.json and the data shards use scripts/poll_format.py: format 2 names the
+// crosstab (category, group) slots once and stores each candidate's crosstabs as
+// a positional array over them. Decodes back to the nested shape getDemoValue reads.
+function decodePolls(data) {
+  if (Array.isArray(data)) return data; // format 1: plain list
+  if (data.format !== 2) throw new Error(`Unsupported poll file format: ${data.format}`);
+  const slots = data.crosstab_groups.flatMap(([category, groups]) => groups.map(group => [category, group]));
+  return data.polls.map(p => {
+    if (!p.crosstabs) return p;
+    const crosstabs = {};
+    Object.entries(p.crosstabs).forEach(([candId, vals]) => {
+      if (!Array.isArray(vals)) { crosstabs[candId] = vals; return; }
+      const nested = {};
+      vals.forEach((val, i) => {
+        if (val == null) return;
+        const [category, group] = slots[i];
+        (nested[category] = nested[category] || {})[group] = val;
+      });
+      crosstabs[candId] = nested;
+    });
+    return { ...p, crosstabs };
+  });
+}
+
 function weightedAverage(polls, candId) {
   if (!polls.length) return null;
   let totalWeight = 0, weightedSum = 0;
@@ -91,6 +120,36 @@ function weightedAverageDemo(polls, candId, demoFilter) {
   return totalWeight > 0 ? (weightedSum / totalWeight).toFixed(1) : null;
 }
 
+// Averages precomputed by scripts/aggregate.py (same weights as above). Recency weights
+// share one exp(-now/60) factor, so the artifact stays exact until the polls change.
+function aggregateAverage(aggregates, state, candId, demoFilter) {
+  const rows = aggregates?.states?.[state];
+  if (!rows) return null;
+  const f = aggregates.filters.indexOf(demoFilter ? `${demoFilter.category}:${demoFilter.group}` : "overall");
+  const c = aggregates.candidates.indexOf(candId);
+  const val = f >= 0 && c >= 0 ? rows[f][c] : null;
+  return val != null ? val.toFixed(1) : null;
+}
+
+// Daily weighted-average rows from scripts/trend.py. Each candidate's series is
+// stored as [day offset, value] change points; the value holds until the next one.
+function trendRows(trends, state) {
+  const series = trends?.states?.[state];
+  if (!series) return [];
+  const DAY = 24 * 60 * 60 * 1000;
+  const start = new Date(trends.start + "T00:00:00Z");
+  const days = Math.round((new Date(trends.through + "T00:00:00Z") - start) / DAY) + 1;
+  const rows = Array.from({ length: days }, (_, i) =>
+    ({ label: formatDate(new Date(start.getTime() + i * DAY).toISOString().slice(0, 10)) }));
+  Object.entries(series).forEach(([candId, points]) => {
+    points.forEach(([offset, val], k) => {
+      const end = k + 1 < points.length ? points[k + 1][0] : days;
+      for (let i = offset; i < end; i++) rows[i][candId] = val;
+    });
+  });
+  return rows;
+}
+
 const DEMO_FILTERS = [
   { category: "gender",    group: "Men" },
   { category: "gender",    group: "Women" },
@@ -388,6 +447,11 @@ function PasswordGate({ children }) {
 
 export default function PollingTracker() {
   const [basePollsFromServer, setBasePollsFromServer] = useState([]);
+  const [serverPollCount, setServerPollCount]         = useState(0);
+  const [shardStates, setShardStates]                 = useState([]);
+  const [aggregates, setAggregates]                   = useState(null);
+  const [trends, setTrends]                           = useState(null);
+  const [chartMode, setChartMode]                     = useState("trend");
   const [delta, setDelta]                             = useState({ edits:{}, additions:[], deletions:[] });
   const [loaded, setLoaded]                           = useState(false);
   const [lastUpdated, setLastUpdated]                 = useState(null);
@@ -401,14 +465,48 @@ export default function PollingTracker() {
   // Load server polls + local delta
   useEffect(() => {
     async function load() {
+      // Hashed files from the manifest are immutable, so repeat visits only
+      // download what changed; without a manifest, revalidate the flat files.
+      let manifest = null;
       try {
-        const res = await fetch("/polls.json?t=" + Date.now());
-        const data = await res.json();
-        setBasePollsFromServer(data);
+        const res = await fetch("/data/manifest.json", { cache:"no-cache" });
+        if (res.ok) manifest = await res.json();
+      } catch {}
+      const dataUrl = (key, flat) => manifest?.files?.[key] ? `/data/${manifest.files[key]}` : flat;
+      const fetchJson = async url => {
+        const res = await fetch(url, url.startsWith("/data/") ? {} : { cache:"no-cache" });
+        if (!res.ok) throw new Error(`${url}: ${res.status}`);
+        return res.json();
+      };
+      const fetchShards = async shards =>
+        (await Promise.all(shards.map(s => fetchJson(`/data/${s.file}`).then(decodePolls)))).flat();
+      const aggregatesReq = fetchJson(dataUrl("aggregates", "/aggregates.json")).catch(() => null);
+      const trendsReq = fetchJson(dataUrl("trends", "/trends.json")).catch(() => null);
+      let older = [];
+      try {
+        if (manifest) {
+          const months = [...new Set(manifest.shards.map(s => s.month))].sort().reverse().slice(0, INITIAL_SHARD_MONTHS);
+          older = manifest.shards.filter(s => !months.includes(s.month));
+          setServerPollCount(manifest.polls);
+          setShardStates(manifest.shards.map(s => s.state));
+          setBasePollsFromServer(await fetchShards(manifest.shards.filter(s => months.includes(s.month))));
+        } else {
+          const data = decodePolls(await fetchJson("/polls.json"));
+          setServerPollCount(data.length);
+          setBasePollsFromServer(data);
+        }
         setLastUpdated(new Date().toLocaleDateString());
       } catch { setBasePollsFromServer([]); }
+      setAggregates(await aggregatesReq);
+      setTrends(await trendsReq);
       setDelta(loadDelta());
       setLoaded(true);
+      if (older.length) {
+        try {
+          const rest = await fetchShards(older);
+          setBasePollsFromServer(recent => [...recent, ...rest]);
+        } catch {}
+      }
     }
     load();
   }, []);
@@ -429,9 +527,9 @@ export default function PollingTracker() {
   const localChangeCount = Object.keys(delta.edits).length + delta.additions.length + delta.deletions.length;
 
   const allStates = useMemo(() => {
-    const states = [...new Set(allPolls.map(p => p.state || "National"))].sort();
+    const states = [...new Set([...shardStates, ...allPolls.map(p => p.state || "National")])].sort();
     return ["All", "National", ...states.filter(s => s !== "National")];
-  }, [allPolls]);
+  }, [allPolls, shardStates]);
 
   const filteredPolls = useMemo(() =>
     stateFilter === "All" ? allPolls : allPolls.filter(p => (p.state || "National") === stateFilter),
@@ -493,19 +591,29 @@ export default function PollingTracker() {
 
   // ── Derived data ──
 
+  // Render from the precomputed artifact unless local edits make it stale
+  const useAggregates = aggregates && aggregates.polls === serverPollCount && localChangeCount === 0;
+  const averageFor = useCallback((candId, demo) =>
+    useAggregates
+      ? aggregateAverage(aggregates, stateFilter, candId, demo)
+      : weightedAverageDemo(filteredPolls, candId, demo),
+  [useAggregates, aggregates, stateFilter, filteredPolls]);
+
   const averages = useMemo(() =>
-    CANDIDATES.map(c => ({ ...c, avg: weightedAverageDemo(filteredPolls, c.id, demoFilter) }))
+    CANDIDATES.map(c => ({ ...c, avg: averageFor(c.id, demoFilter) }))
       .filter(c => c.avg !== null)
       .sort((a,b) => parseFloat(b.avg) - parseFloat(a.avg)),
-  [filteredPolls, demoFilter]);
+  [averageFor, demoFilter]);
+
+  const showTrend = chartMode === "trend" && trends && trends.polls === serverPollCount && localChangeCount === 0;
 
-  const chartData = useMemo(() =>
+  const chartData = useMemo(() => showTrend ? trendRows(trends, stateFilter) :
     [...filteredPolls].sort((a,b) => new Date(a.date) - new Date(b.date)).map(p => {
       const row = { label:`${formatDate(p.date)}${p.state&&p.state!=="National"?` (${p.state})`:""}`, pollster:p.pollster, state:p.state };
       CANDIDATES.forEach(c => { row[c.id] = parseFloat(p[c.id]) || null; });
       return row;
     }),
-  [filteredPolls]);
+  [showTrend, trends, stateFilter, filteredPolls]);
 
   const selectedCrosstabCand = CANDIDATES.find(c=>c.id===crosstabCandidate) || CANDIDATES[0];
   const nationalCount = allPolls.filter(p=>(p.state||"National")==="National").length;
@@ -645,6 +753,11 @@ export default function PollingTracker() {
         <div style={{ padding:"24px 36px" }}>
           <div style={{ fontSize:11, color:"#666", fontFamily:"monospace", letterSpacing:"0.15em", marginBottom:6 }}>
             POLLING TRENDS · {stateFilter==="All"?"All polls":stateFilter} · Apr 2025–present
+            {trends && ["trend","polls"].map(mode=>(
+              <button key={mode} onClick={()=>setChartMode(mode)} style={{ background:"none", border:"none", color:chartMode===mode?"#e8e6df":"#555", cursor:"pointer", fontFamily:"monospace", fontSize:11, letterSpacing:"0.15em", textTransform:"uppercase", marginLeft:12, padding:0 }}>
+                {mode==="trend"?"Daily average":"Individual polls"}
+              </button>
+            ))}
           </div>
           {chartData.length < 2
             ? <div style={{ color:"#555", fontFamily:"monospace", fontSize:13, padding:"40px 0" }}>Need at least 2 polls for this view. Try selecting "All" above.</div>
@@ -655,7 +768,7 @@ export default function PollingTracker() {
                   <YAxis tick={{ fill:"#666", fontSize:11, fontFamily:"monospace" }} tickLine={false} unit="%" domain={[0,"auto"]}/>
                   <Tooltip contentStyle={{ background:"#111118", border:"1px solid #333", fontFamily:"monospace", fontSize:12 }} labelStyle={{ color:"#aaa", marginBottom:6 }} formatter={(val,name)=>{ const c=CANDIDATES.find(c=>c.id===name); return [`${val}%`,c?.short||name]; }}/>
                   {CANDIDATES.filter(c=>visibleCands.includes(c.id)).map(c=>(
-                    <Line key={c.id} type="monotone" dataKey={c.id} stroke={c.color} strokeWidth={2} dot={{ r:4, fill:c.color, strokeWidth:0 }} connectNulls activeDot={{ r:6 }}/>
+                    <Line key={c.id} type="monotone" dataKey={c.id} stroke={c.color} strokeWidth={2} dot={showTrend?false:{ r:4, fill:c.color, strokeWidth:0 }} connectNulls activeDot={{ r:6 }}/>
                   ))}
                 </LineChart>
               </ResponsiveContainer>
@@ -716,7 +829,7 @@ export default function PollingTracker() {
             <tfoot>
               <tr style={{ borderTop:"2px solid #333" }}>
                 <td colSpan={4} style={{ ...tdStyle, color:"#1a6bff", letterSpacing:"0.1em" }}>AVG {stateFilter!=="All"?`(${stateFilter})`:""}</td>
-                {CANDIDATES.map(c=><td key={c.id} style={{ ...tdStyle, color:c.color, fontWeight:"bold" }}>{weightedAverageDemo(filteredPolls,c.id,demoFilter)?`${weightedAverageDemo(filteredPolls,c.id,demoFilter)}%`:"—"}</td>)}
+                {CANDIDATES.map(c=>{ const avg = averageFor(c.id,demoFilter); return <td key={c.id} style={{ ...tdStyle, color:c.color, fontWeight:"bold" }}>{avg?`${avg}%`:"—"}</td>; })}
                 <td colSpan={2} style={tdStyle}></td>
               </tr>
             </tfoot>
@@ -749,7 +862,7 @@ export default function PollingTracker() {
           <div style={{ marginBottom:20, paddingBottom:16, borderBottom:"1px solid #1a1a22" }}>
             <span style={{ fontSize:22, fontWeight:"bold", color:selectedCrosstabCand.color }}>{selectedCrosstabCand.name}</span>
             <span style={{ fontSize:13, color:"#666", fontFamily:"monospace", marginLeft:16 }}>
-              avg {weightedAverage(filteredPolls, selectedCrosstabCand.id) || "—"}% · {stateFilter==="All"?"all polls":stateFilter}
+              avg {averageFor(selectedCrosstabCand.id, null) || "—"}% · {stateFilter==="All"?"all polls":stateFilter}
             </span>
           </div>
           <CrosstabsPanel polls={filteredPolls} candidate={selectedCrosstabCand}/>